@@ -1,10 +1,11 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import datetime
+import forecasting
+import ohlcv_store
+import portfolio_backtest
+from swing_strategy import add_volume_indicators
 
 st.title('Institutional Moves Detector and Backtester')
 
@@ -28,9 +29,9 @@ start_date = st.sidebar.date_input('Start Date', pd.to_datetime('2022-01-01'))
 end_date = st.sidebar.date_input('End Date', pd.to_datetime('today'))
 
 
-# Fetch data
+# Fetch data (served from the local OHLCV store, only missing bars are downloaded)
 def fetch_data(ticker, start_date, end_date, interval='1d'):
-    return yf.download(ticker, start=start_date, end=end_date, interval=interval)
+    return ohlcv_store.load_ohlcv([ticker], start_date, end_date, interval=interval)[ticker]
 
 
 data = fetch_data(ticker, start_date, end_date, interval=timeframe)
@@ -39,27 +40,8 @@ data = fetch_data(ticker, start_date, end_date, interval=timeframe)
 data.dropna(inplace=True)
 
 
-# Calculate VWAP
-def calculate_vwap(data):
-    q = data['Volume'].values
-    p = data['Close'].values
-    vwap = (p * q).cumsum() / q.cumsum()
-    return vwap
-
-
-data['VWAP'] = calculate_vwap(data)
-
-# Calculate average volume over a period (e.g., 20 days)
-data['Average Volume'] = data['Volume'].rolling(window=20).mean()
-
-# Handle NaNs in Average Volume
-data['Average Volume'].fillna(method='bfill', inplace=True)
-
-# Identify unusual volume spikes
-data['Unusual Volume'] = data['Volume'] > 2 * data['Average Volume']
-
-# Handle NaNs in Unusual Volume
-data['Unusual Volume'].fillna(False, inplace=True)
+# VWAP, 20-day average volume and unusual volume spikes
+data = add_volume_indicators(data, symbol=ticker, interval=timeframe)
 
 
 # Backtest Strategy
@@ -78,18 +60,12 @@ backtested_data['Cumulative Market Return'] = (1 + backtested_data['Daily Return
 backtested_data['Cumulative Strategy Return'] = (1 + backtested_data['Strategy Return']).cumprod()
 
 
-# Forecast Prices
-def forecast_prices(data, periods=5):
-    model = ExponentialSmoothing(data['Close'], trend='add', seasonal=None)
-    fit = model.fit()
-    forecast = fit.forecast(periods)
-    return forecast
-
-
-forecast = forecast_prices(data)
+# Forecast Prices (cached per symbol/interval/last bar, warm-started when new bars arrive)
+forecast = forecasting.forecast_prices(data, symbol=ticker, interval=timeframe)
 forecast_index = pd.date_range(start=data.index[-1], periods=len(forecast) + 1, closed='right')
 
 # Plotting
+import matplotlib.pyplot as plt
 fig, ax = plt.subplots(4, 1, figsize=(14, 18))
 
 # Plot Close Price and VWAP
@@ -132,16 +108,24 @@ st.write(f'Winning Trades: {winning_trades}')
 st.write(f'Losing Trades: {losing_trades}')
 st.write(f'Win Rate: {win_rate:.2%}')
 
-# Capital Management
+# Capital Management: the whole universe is backtested as one portfolio, with capital
+# split equally across the open unusual-volume positions every day
 capital = 20000
-num_stocks = len(nifty50_symbols)  # Assuming you are considering all stocks in Nifty 50
-investment_per_stock = capital / num_stocks
+universe = ohlcv_store.load_ohlcv(nifty50_symbols, start_date, end_date, interval='1d')
+universe_close = portfolio_backtest.price_matrix(universe, 'Close')
+universe_volume = portfolio_backtest.price_matrix(universe, 'Volume')
+universe_signals = portfolio_backtest.unusual_volume_signals(universe_close, universe_volume)
+portfolio = portfolio_backtest.backtest_portfolio(universe_close, universe_signals, capital=capital)
 
 # Display Capital Allocation
 st.subheader('Capital Allocation')
 st.write(f'Total Capital: Rs {capital}')
-st.write(f'Number of Stocks: {num_stocks}')
-st.write(f'Investment per Stock: Rs {investment_per_stock:.2f}')
+st.write(f'Number of Stocks: {universe_close.shape[1]}')
+st.line_chart(portfolio['equity'].rename('Portfolio Equity'))
+st.write(pd.Series(portfolio_backtest.performance(portfolio['returns'], portfolio['equity'], capital)).to_frame('Portfolio').T)
+current_allocation = portfolio['allocation'][portfolio['allocation'] > 0]
+st.write('Current Allocation (Rs):')
+st.write(current_allocation.round(2).to_frame('Investment').T if not current_allocation.empty else 'No open positions.')
 
 
 # Swing Trading Strategy
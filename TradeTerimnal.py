@@ -1,11 +1,11 @@
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
+from nse_client import derivatives, capital_market
 from datetime import datetime
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
 import time
+import session_store
 import pytz  # New import for handling Indian time zone
 # from nselib import greeks
 
@@ -24,11 +24,10 @@ tab1, tab2, tab4, tab5, tab6 = st.tabs([
 # Create side bar to select index instrument and for expiry day selection
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
 ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
 
 # Extracting data from nselib library
 try:
-    option = derivatives.nse_live_option_chain(index, exp)
+    option = snapshots.option_chain(index, ex)
 
     # Rename columns and add time column (hh:mm format)
     o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
@@ -81,6 +80,7 @@ try:
         oi_atm_filtered['Time'] = current_time
 
         # Plot OI and OI change for 5 strikes above and below ATM in separate subplots
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(2, 2, figsize=(12, 8))
 
         ax[0, 0].bar(oi_atm_filtered.index, oi_atm_filtered['CE_OI'], color='blue', width=10)
@@ -144,15 +144,19 @@ try:
         # Initialize signal history if it doesn't exist
         if 'signal_history' not in st.session_state:
             st.session_state.signal_history = pd.DataFrame(columns=[
-                'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time'
+                'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time',
+                'Date', 'Index', 'Expiry'
             ])
 
         # Generate current signals
         current_signals = oi[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time']].copy()
         current_signals['Strike_Price'] = current_signals.index
+        current_signals['Date'] = datetime.now(indian_tz).strftime('%Y-%m-%d')
+        current_signals['Index'] = index
+        current_signals['Expiry'] = ex
 
         # Append new signals to the history
-        st.session_state.signal_history = pd.concat([st.session_state.signal_history, current_signals], ignore_index=True)
+        session_store.append_rows('signal_history', current_signals)
 
         # Display the updated signal history DataFrame with color coding
         st.dataframe(
@@ -249,7 +253,8 @@ tab_terminal = st.tabs(["Trading Terminal"])
                 'Quantity': quantity,
                 'Entry_Price': entry_price
             }
-            st.session_state.portfolio = st.session_state.portfolio.append(trade, ignore_index=True)
+            # trades are capped but never dropped for idleness
+            session_store.append_rows('portfolio', pd.DataFrame([trade]), trim_idle=False)
     
         # Display current portfolio
         st.write("### Current Portfolio")
@@ -0,0 +1,296 @@
+# Server-side alert engine: evaluates every alert rule over the latest snapshots of
+# all indices/expiries in one vectorized pass, with hysteresis, cooldown and dedup
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+import requests
+
+import chain_history
+import snapshots
+
+logger = logging.getLogger(__name__)
+indian_tz = pytz.timezone('Asia/Kolkata')
+
+KEY_NAMES = ['Index', 'Expiry', 'Strike_Price']
+
+
+class AlertRule:
+    """
+    Fires when `column` (divided by `ratio_to` if given) goes above/below `threshold`
+    and re-arms only after it has crossed back over `clear` (hysteresis).
+    Rules listed in `requires` must hold on the same strike for this rule to fire.
+    Rules with notify=False are only used as building blocks for other rules.
+    """
+
+    def __init__(self, name, column, threshold, clear, ratio_to=None, direction='above',
+                 requires=(), notify=True, message=''):
+        self.name = name
+        self.column = column
+        self.threshold = threshold
+        self.clear = clear
+        self.ratio_to = ratio_to
+        self.direction = direction
+        self.requires = tuple(requires)
+        self.notify = notify
+        self.message = message or name
+
+
+DEFAULT_RULES = [
+    # OI Change Alert tab of oichart.py
+    AlertRule('PE_CE_OI_CHANGE_3X', 'PE_CHG_OI', 3.0, 2.5, ratio_to='CE_CHG_OI',
+              message='PE OI change more than 3 times the CE OI change'),
+    # Alert conditions of alertoptions.py, on each contract's own intraday history
+    AlertRule('CE_ABOVE_VWAP', 'CE_LTP', 1.0, 0.995, ratio_to='VWAP', notify=False),
+    AlertRule('VOLUME_SPIKE', 'Volume', 1.5, 1.4, ratio_to='Avg_Volume', notify=False),
+    AlertRule('CE_OI_BELOW_AVG', 'CE_OI', 0.99, 1.0, ratio_to='Avg_OI', direction='below', notify=False),
+    AlertRule('CE_MOMENTUM', 'RSI', 60, 55, requires=('CE_ABOVE_VWAP', 'VOLUME_SPIKE', 'CE_OI_BELOW_AVG'),
+              message='CE above VWAP with volume spike, RSI > 60 and CE OI below average'),
+]
+
+
+def add_alert_features(frame, history_store):
+    # Per-contract CE indicators (VWAP, RSI, volume/OI averages) from the intraday history
+    features = {key: history_store.contract_indicators(*key, side='CE')
+                for key in frame.index.droplevel('Strike_Price').unique()}
+    features = {key: f for key, f in features.items() if not f.empty}
+    if not features:
+        return frame.assign(VWAP=np.nan, RSI=np.nan, Volume=np.nan, Avg_Volume=np.nan, Avg_OI=np.nan)
+    features = pd.concat(features, names=KEY_NAMES)[['VWAP', 'RSI', 'Volume', 'Avg_Volume', 'Avg_OI']]
+    frame = frame.copy()
+    frame.index = frame.index.set_levels(frame.index.levels[2].astype(float), level=2)
+    return frame.join(features)
+
+
+def build_frame(snaps, history_store):
+    # Stack the chains of all snapshots into one (Index, Expiry, Strike_Price) frame
+    frame = pd.concat({key: snap.chain for key, snap in snaps.items()}, names=KEY_NAMES)
+    return add_alert_features(frame, history_store)
+
+
+class LogFileSink:
+    # Appends every alert as one JSON line
+    def __init__(self, path='alerts.log'):
+        self.path = path
+
+    def deliver(self, events):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + '\n')
+
+
+class WebhookSink:
+    # POSTs the batch of alerts as JSON to a local webhook
+    def __init__(self, url, timeout=2):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def deliver(self, events):
+        self.session.post(self.url, data=json.dumps(events, default=str),
+                          headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+
+
+class PublisherOnlySink:
+    # Delivers to `sink` only from the process that fetches the snapshots, so alerts are
+    # logged / posted once even when several server processes share the snapshots
+    def __init__(self, sink, poller):
+        self.sink = sink
+        self.poller = poller
+
+    def deliver(self, events):
+        if self.poller.is_publisher():
+            self.sink.deliver(events)
+
+
+class InboxSink:
+    # Keeps the latest alerts in memory for the in-app inbox
+    def __init__(self, maxlen=500):
+        self.events = deque(maxlen=maxlen)
+
+    def deliver(self, events):
+        self.events.extend(events)
+
+    def messages(self, index=None, expiry=None):
+        df = pd.DataFrame(list(self.events), columns=['Time', 'Index', 'Expiry', 'Strike_Price', 'Rule', 'Value', 'Message'])
+        if index is not None:
+            df = df[df['Index'] == index]
+        if expiry is not None:
+            df = df[df['Expiry'] == expiry]
+        return df.iloc[::-1].reset_index(drop=True)
+
+
+class AlertEngine:
+    def __init__(self, rules=DEFAULT_RULES, sinks=(), cooldown=900, dedup_size=10000, history_store=None,
+                 covered=None):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.history_store = history_store or chain_history.get_history_store()
+        self.cooldown = cooldown
+        # covered() -> the (index, expiry) pairs still polled; state of other pairs is dropped
+        self.covered = covered
+        self._compile()
+        self._keys = pd.MultiIndex.from_tuples([], names=KEY_NAMES)
+        self._active = np.zeros((0, len(self.rules)), dtype=bool)
+        self._last_fired = np.full((0, len(self.rules)), -np.inf)
+        self._seen_snapshots = {}
+        self._recent_ids = deque(maxlen=dedup_size)
+        self._recent_id_set = set()
+        self._lock = threading.Lock()
+
+    def _compile(self):
+        # Turn the rule list into index/threshold arrays so evaluation is pure numpy
+        names = [rule.name for rule in self.rules]
+        self._columns = sorted({rule.column for rule in self.rules} | {rule.ratio_to for rule in self.rules if rule.ratio_to})
+        col_pos = {col: i for i, col in enumerate(self._columns)}
+        ones = len(self._columns)  # constant column appended at evaluation time
+        self._num = np.array([col_pos[rule.column] for rule in self.rules])
+        self._den = np.array([col_pos[rule.ratio_to] if rule.ratio_to else ones for rule in self.rules])
+        sign = np.array([1.0 if rule.direction == 'above' else -1.0 for rule in self.rules])
+        self._sign = sign
+        self._on = sign * np.array([rule.threshold for rule in self.rules], dtype=float)
+        self._off = sign * np.array([rule.clear for rule in self.rules], dtype=float)
+        self._gates = np.zeros((len(self.rules), len(self.rules)), dtype=int)
+        for i, rule in enumerate(self.rules):
+            for required in rule.requires:
+                self._gates[i, names.index(required)] = 1
+        self._notify = np.array([rule.notify for rule in self.rules])
+
+    def _align(self, keys):
+        # Row positions of `keys` in the state arrays, adding rows for new strikes
+        pos = self._keys.get_indexer(keys)
+        missing = pos < 0
+        if missing.any():
+            self._keys = self._keys.append(keys[missing])
+            extra = int(missing.sum())
+            self._active = np.vstack([self._active, np.zeros((extra, len(self.rules)), dtype=bool)])
+            self._last_fired = np.vstack([self._last_fired, np.full((extra, len(self.rules)), -np.inf)])
+            pos = self._keys.get_indexer(keys)
+        return pos
+
+    def _prune(self, pairs):
+        # Forget the hysteresis/cooldown state of index/expiry pairs no longer polled
+        pairs = set(pairs)
+        self._seen_snapshots = {key: at for key, at in self._seen_snapshots.items() if key in pairs}
+        contracts = self._keys.droplevel('Strike_Price')
+        keep = contracts.isin(list(pairs)) if pairs else np.zeros(len(contracts), dtype=bool)
+        if not keep.all():
+            self._keys = self._keys[keep]
+            self._active = self._active[keep]
+            self._last_fired = self._last_fired[keep]
+
+    def evaluate(self, snaps, now=None):
+        # snaps: {(index, expiry): snapshots.Snapshot}; returns the delivered events
+        with self._lock:
+            if self.covered is not None:
+                self._prune(self.covered())
+            fresh = {key: snap for key, snap in snaps.items()
+                     if snap.fetched_at > self._seen_snapshots.get(key, -np.inf)}
+            if not fresh:
+                return []
+            for key, snap in fresh.items():
+                self._seen_snapshots[key] = snap.fetched_at
+            now = time.time() if now is None else now
+
+            frame = build_frame(fresh, self.history_store)
+            x = frame.reindex(columns=self._columns).to_numpy(dtype=float)
+            x = np.column_stack([x, np.ones(len(x))])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = x[:, self._num] / x[:, self._den]
+            scored = values * self._sign
+            fire = scored > self._on
+            clear = scored < self._off
+            # a rule only holds where all of its required rules hold as well
+            fire &= ((~fire).astype(int) @ self._gates.T) == 0
+
+            pos = self._align(frame.index)
+            active = self._active[pos]
+            last_fired = self._last_fired[pos]
+            triggered = fire & ~active & (now - last_fired >= self.cooldown)
+            self._active[pos] = (active | triggered) & ~clear
+            last_fired[triggered] = now
+            self._last_fired[pos] = last_fired
+
+            events = self._events(frame, values, triggered & self._notify, fresh)
+        self._deliver(events)
+        return events
+
+    def _events(self, frame, values, triggered, fresh):
+        events = []
+        rows, cols = np.nonzero(triggered)
+        for row, col in zip(rows, cols):
+            index, expiry, strike = frame.index[row]
+            fetched_at = fresh[(index, expiry)].fetched_at
+            event_id = f'{index}|{expiry}|{strike}|{self.rules[col].name}|{fetched_at}'
+            if event_id in self._recent_id_set:
+                continue
+            if len(self._recent_ids) == self._recent_ids.maxlen:
+                self._recent_id_set.discard(self._recent_ids[0])
+            self._recent_ids.append(event_id)
+            self._recent_id_set.add(event_id)
+            events.append({
+                'Time': datetime.fromtimestamp(fetched_at, indian_tz).strftime('%Y-%m-%d %H:%M:%S'),
+                'Index': index,
+                'Expiry': expiry,
+                'Strike_Price': strike,
+                'Rule': self.rules[col].name,
+                'Value': round(float(values[row, col]), 2),
+                'Message': self.rules[col].message,
+            })
+        return events
+
+    def _deliver(self, events):
+        if not events:
+            return
+        for sink in self.sinks:
+            try:
+                sink.deliver(events)
+            except Exception:
+                logger.exception('Alert sink %r failed', sink)
+
+
+def coverage(index, expiry):
+    """
+    (caption listing the index/expiry pairs the rules run on, warning or None): the
+    warning says when (index, expiry) is not polled, so no alert is raised for it.
+    """
+    covered = snapshots.get_poller().covered_pairs()
+    if not covered:
+        return "Alert rules start with the first background poll.", None
+    caption = "Alert rules run on: " + ", ".join(f"{i} {e}" for i, e in covered)
+    if (index, expiry) in covered:
+        return caption, None
+    return caption, (f"{index} {expiry} is not polled in the background, so no alerts are raised for it. "
+                     "Set POLL_EXPIRIES to poll more expiries per index.")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    # Start the alert engine once per server process on the shared snapshot poller
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            poller = snapshots.get_poller()
+            inbox = InboxSink()
+            sinks = [PublisherOnlySink(LogFileSink(os.environ.get('ALERT_LOG_FILE', 'alerts.log')), poller), inbox]
+            if os.environ.get('ALERT_WEBHOOK_URL'):
+                sinks.append(PublisherOnlySink(WebhookSink(os.environ['ALERT_WEBHOOK_URL']), poller))
+            # the history store is registered on the poller first, so every snapshot is
+            # in the per-contract history before the rules are evaluated on it; the poller
+            # only starts once both listeners are in place
+            _engine = AlertEngine(sinks=sinks, history_store=chain_history.get_history_store(start=False),
+                                  covered=poller.covered_pairs)
+            _engine.inbox = inbox
+            poller.add_listener(_engine.evaluate)
+            poller.start()
+        return _engine
@@ -1,10 +1,10 @@
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
-from datetime import datetime
+from nse_client import derivatives, capital_market
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
+import alert_engine
+import chain_history
 
 # Add title of the web-app
 st.title(':red[NSE] **Option Dashboard**')
@@ -16,11 +16,10 @@ tab1, tab2, tab3, tab4 = st.tabs(["Option Chain", "OI", "Ratio Strategy", "Alert
 # Create sidebar to select index instrument and expiry date
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
 ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
 
 # Extracting data from nselib library
 try:
-    option = derivatives.nse_live_option_chain(index, exp)
+    option = snapshots.option_chain(index, ex)
     o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
     st.write("Option Chain Data:", o)
 
@@ -44,6 +43,7 @@ try:
 
     with tab2:
         st.subheader('Open Interest Analysis')
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(2, 1)
         ax[0].bar(oi.index, oi['CALLS_OI'], color='blue', width=20)
         ax[0].bar(oi.index - 10, oi['PUTS_OI'], color='red', width=20)
@@ -55,44 +55,27 @@ try:
         ax[1].set_xlabel('Change in OI')
         st.pyplot(fig)
 
-    def calculate_vwap(df):
-        df['VWAP'] = (df['CALLS_LTP'] * df['CALLS_OI'] + df['PUTS_LTP'] * df['PUTS_OI']) / (df['CALLS_OI'] + df['PUTS_OI'])
-        return df
-
-    def calculate_rsi(df, window=14):
-        delta = df['CALLS_LTP'].diff()
-        gain = (delta.where(delta > 0, 0)).fillna(0)
-        loss = (-delta.where(delta < 0, 0)).fillna(0)
-        avg_gain = gain.rolling(window=window, min_periods=1).mean()
-        avg_loss = loss.rolling(window=window, min_periods=1).mean()
-        rs = avg_gain / avg_loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        return df
-
-    def filter_strikes(df, cmp, avg_vol, avg_oi):
-        df['Volume'] = df['CALLS_OI'] + df['PUTS_OI']
-        df['Avg_Volume'] = avg_vol
-        df['Avg_OI'] = avg_oi
+    # Per-contract indicators from the intraday history of this expiry (one time series
+    # per strike), instead of treating neighbouring strikes as a time series
+    def filter_strikes(df, cmp):
         st.write("Data with VWAP and RSI:", df)
 
-        conditions_met = df[(df['CALLS_LTP'] > df['VWAP']) &
-                            (df['Volume'] > 1.5 * df['Avg_Volume']) &
-                            (df['RSI'] > 60) &
-                            (df['CALLS_OI'] < df['Avg_OI']) &
-                            (abs(df['CALLS_OI'] - df['Avg_OI']) > 0.01 * df['Avg_OI'])]
+        conditions_met = df[df['Conditions_Met']]
         st.write("Conditions Met:", conditions_met)
 
         itm_calls = conditions_met[conditions_met.index > cmp].head(7)
         itm_puts = conditions_met[conditions_met.index < cmp].tail(7)
         return pd.concat([itm_calls, itm_puts])
 
-    o = calculate_vwap(o)
-    o = calculate_rsi(o)
+    contracts = chain_history.get_history_store().contract_indicators(index, ex, side='CE')
+    if contracts.empty:
+        st.write("Intraday history for this expiry is still being collected.")
+        contracts = pd.DataFrame(columns=['LTP', 'OI', 'VWAP', 'RSI', 'Volume', 'Avg_Volume', 'Avg_OI',
+                                          'VWAP_Cross_Up', 'Conditions_Met'], dtype=float)
+    contracts = contracts.rename(columns={'LTP': 'CALLS_LTP', 'OI': 'CALLS_OI'})
+    contracts['Conditions_Met'] = contracts['Conditions_Met'].astype(bool)
 
-    average_volume = o['CALLS_OI'].rolling(window=20).mean()
-    average_oi = o['CALLS_OI'].rolling(window=20).mean()
-
-    valid_strikes = filter_strikes(o, cmp, average_volume, average_oi)
+    valid_strikes = filter_strikes(contracts, cmp)
     st.write("Valid Strikes:", valid_strikes)
 
     with tab3:
@@ -103,6 +86,14 @@ try:
         st.subheader('Alerts Based on Conditions')
         st.table(valid_strikes)
 
+        # Alerts raised by the background engine, even while nobody had this tab open
+        st.write("**Alert Inbox**")
+        st.dataframe(alert_engine.get_engine().inbox.messages(index, ex), use_container_width=True)
+        caption, warning = alert_engine.coverage(index, ex)
+        st.caption(caption)
+        if warning:
+            st.warning(warning)
+
     st.write(index)
     col1, col2 = st.columns(2)
     col1.metric('**Spot Price**', cmp)
@@ -0,0 +1,214 @@
+# JSON API over the polled option-chain snapshots for programmatic consumers, served by
+# tornado on asyncio. Every body is rendered once per snapshot by a poller listener and
+# kept with its ETag, so a request is a dict lookup (or a 304) and never waits for NSE.
+#
+#   GET /api                                     index/expiry pairs with their snapshot time
+#   GET /api/<index>/<expiry>                    every view of one chain
+#   GET /api/<index>/<expiry>/<view>             chain | pcr | top_oi_change | signals |
+#                                                ratio_spreads | signal_history
+#   WS  /api/stream                              pushed per-strike changes (see chain_stream)
+#
+#   python analytics_api.py --port 8600     # standalone (SHARED_SNAPSHOTS=1 to follow the app)
+#
+# The API has no authentication and listens on API_HOST, default 127.0.0.1; set 0.0.0.0
+# (or --host) to serve other machines.
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+import pytz
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+import chain_stream
+import metrics
+import oi_analytics
+import option_data
+import snapshots
+
+logger = logging.getLogger(__name__)
+indian_tz = pytz.timezone('Asia/Kolkata')
+
+VIEWS = ('chain', 'pcr', 'top_oi_change', 'signals', 'ratio_spreads', 'signal_history')
+# Rows of signal history kept per index/expiry (one row per strike per snapshot)
+HISTORY_ROWS = int(os.environ.get('API_HISTORY_ROWS', 5000))
+HISTORY_COLUMNS = ['Timestamp', 'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal']
+
+
+def _records(frame):
+    # DataFrame indexed by strike -> list of dicts with a Strike_Price field
+    return json.loads(frame.rename_axis('Strike_Price').reset_index().to_json(orient='records'))
+
+
+def _encode(payload):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return '"%s"' % hashlib.sha1(body).hexdigest(), body
+
+
+class AnalyticsAPI:
+    """
+    Rendered JSON bodies per (index, expiry, view) with their ETags. `update` is the
+    poller listener; the request handlers only read what it stored. New snapshots are
+    also pushed to the websocket subscribers of `stream`.
+    """
+
+    def __init__(self, history_rows=HISTORY_ROWS):
+        self.history_rows = history_rows
+        self._bodies = {}
+        self._history = {}
+        self._listing = _encode([])
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self.stream = chain_stream.ChainStream()
+
+    def render(self, snap, oi, meta):
+        # {view: payload} of one snapshot; oi is its strike window with signals
+        history = self._history.setdefault(snap.key, deque(maxlen=self.history_rows))
+        for row in _records(oi.assign(Timestamp=meta['timestamp'])):
+            history.append({column: row.get(column) for column in HISTORY_COLUMNS})
+        views = {
+            'chain': {**meta, 'data': _records(oi.drop(columns='Signal'))},
+            'pcr': {**meta, 'pcr': float(oi_analytics.pcr(snap.chain)), 'window_pcr': float(oi_analytics.pcr(oi))},
+            'top_oi_change': {**meta, 'data': _records(oi.loc[oi_analytics.top_oi_change(oi)])},
+            'signals': {**meta, 'data': _records(oi)},
+            'ratio_spreads': {**meta, 'data': _records(oi_analytics.ratio_spreads(snap.chain, snap.index, snap.spot))},
+            'signal_history': {**meta, 'data': list(history)},
+        }
+        views['all'] = {**meta, **{view: {k: v for k, v in payload.items() if k not in meta}
+                                   for view, payload in views.items()}}
+        return views
+
+    def update(self, snaps):
+        bodies = {}
+        for key, snap in snaps.items():
+            try:
+                at = datetime.fromtimestamp(snap.fetched_at, indian_tz).strftime('%Y-%m-%d %H:%M:%S')
+                meta = {'index': snap.index, 'expiry': snap.expiry, 'timestamp': at, 'spot': float(snap.spot)}
+                oi = option_data.strike_window(snap.chain, snap.index, snap.spot).copy()
+                oi['Signal'] = oi_analytics.signals(oi)
+                with metrics.timer('api_render', *key):
+                    for view, payload in self.render(snap, oi, meta).items():
+                        bodies[(*key, view)] = _encode(payload)
+                self.stream.update(key, meta, oi)
+            except Exception:
+                logger.exception('Could not render the API views of %s %s', *key)
+                continue
+            self._snapshots[key] = snap.fetched_at
+        listing = [{'index': index, 'expiry': expiry,
+                    'timestamp': datetime.fromtimestamp(at, indian_tz).strftime('%Y-%m-%d %H:%M:%S')}
+                   for (index, expiry), at in sorted(self._snapshots.items())]
+        with self._lock:
+            self._bodies.update(bodies)
+            self._listing = _encode(listing)
+
+    def get(self, index, expiry, view='all'):
+        # (etag, body) or None when the view or snapshot is unknown
+        with self._lock:
+            return self._bodies.get((index, expiry, view))
+
+    def listing(self):
+        with self._lock:
+            return self._listing
+
+
+class _JSONHandler(tornado.web.RequestHandler):
+    # Tornado answers 304 itself when If-None-Match matches compute_etag()
+    def initialize(self, api):
+        self.api = api
+        self._etag = None
+
+    def compute_etag(self):
+        return self._etag
+
+    def send(self, found):
+        if found is None:
+            raise tornado.web.HTTPError(404)
+        self._etag, body = found
+        self.set_header('Content-Type', 'application/json')
+        self.set_header('Cache-Control', 'no-cache')
+        self.write(body)
+
+
+class ListingHandler(_JSONHandler):
+    def get(self):
+        self.send(self.api.listing())
+
+
+class ViewHandler(_JSONHandler):
+    def get(self, index, expiry, view=None):
+        self.send(self.api.get(index, expiry, view or 'all'))
+
+
+def make_app(api):
+    views = '|'.join(VIEWS)
+    return tornado.web.Application([
+        (r'/api/?', ListingHandler, {'api': api}),
+        (r'/api/stream', chain_stream.StreamHandler, {'stream': api.stream}),
+        (r'/api/([A-Z]+)/([0-9]{2}-[A-Za-z]{3}-[0-9]{4})/?', ViewHandler, {'api': api}),
+        (rf'/api/([A-Z]+)/([0-9]{{2}}-[A-Za-z]{{3}}-[0-9]{{4}})/({views})/?', ViewHandler, {'api': api}),
+    ])
+
+
+def attach(api, poller=None):
+    # Feed `api` from the shared poller, starting with the snapshots it already has
+    poller = poller or snapshots.get_poller()
+    api.update(poller.latest_snapshots())
+    poller.add_listener(api.update)
+    poller.start()
+    return api
+
+
+_api = None
+_api_lock = threading.Lock()
+
+
+def start(port=None, host=None):
+    # Serve the API on its own event loop thread once per server process (API_PORT, default
+    # 8600, on API_HOST); with several processes on one host only the first one gets the port
+    global _api
+    with _api_lock:
+        if _api is None:
+            port = int(os.environ.get('API_PORT', 8600)) if port is None else port
+            host = os.environ.get('API_HOST', '127.0.0.1') if host is None else host
+            try:
+                sockets = tornado.netutil.bind_sockets(port, address=host)
+            except OSError as e:
+                logger.warning('Analytics API not started on %s:%s: %s', host, port, e)
+                _api = False
+                return None
+            api = attach(AnalyticsAPI())
+
+            def run():
+                asyncio.set_event_loop(asyncio.new_event_loop())
+                tornado.httpserver.HTTPServer(make_app(api)).add_sockets(sockets)
+                asyncio.get_event_loop().run_forever()
+
+            threading.Thread(target=run, name='analytics-api', daemon=True).start()
+            _api = api
+        return _api or None
+
+
+async def serve(port, host='127.0.0.1'):
+    make_app(attach(AnalyticsAPI())).listen(port, address=host)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON API over the polled option-chain analytics')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('API_PORT', 8600)))
+    parser.add_argument('--host', default=os.environ.get('API_HOST', '127.0.0.1'))
+    params = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    logger.info('Option analytics API on http://%s:%s/api', params.host, params.port)
+    asyncio.run(serve(params.port, params.host))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# Benchmark suite for the dashboard hot paths on synthetic option chains. Each run is
+# stored as JSON in benchmark_results/ and compared with the previous run (or a given
+# baseline); cases whose median got slower than the tolerance are flagged.
+#
+#   python benchmarks.py --strikes 200 --expiries 4 --repeat 20
+#   python benchmarks.py --only signals,pcr --baseline benchmark_results/<run>.json
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import chain_history
+import indicators
+import oi_analytics
+import oi_render
+import option_data
+import synthetic_chain
+
+RESULTS_DIR = 'benchmark_results'
+CASES = {}
+
+
+def case(name):
+    # Register a benchmark: setup(params) returns the function that is timed
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _window(params):
+    # Single-expiry chain of the benchmark index, windowed around the spot like the dashboards
+    option = synthetic_chain.option_chain(params.index, params.strikes, params.expiries, seed=params.seed)
+    o = synthetic_chain.to_chain(option, option['Expiry_Date'].iloc[0])
+    cmp = synthetic_chain.SPOTS[params.index]
+    return o, option_data.strike_window(o, params.index, cmp), cmp
+
+
+@case('strike_window')
+def _strike_window(params):
+    o, _, cmp = _window(params)
+    return lambda: option_data.strike_window(o, params.index, cmp)
+
+
+@case('signals')
+def _signals(params):
+    _, oi, _ = _window(params)
+    return lambda: oi_analytics.signals(oi)
+
+
+@case('top_oi_change')
+def _top_oi_change(params):
+    _, oi, _ = _window(params)
+    return lambda: oi.loc[oi_analytics.top_oi_change(oi)]
+
+
+@case('ratio_spreads')
+def _ratio_spreads(params):
+    o, _, cmp = _window(params)
+    return lambda: oi_analytics.ratio_spreads(o, params.index, cmp)
+
+
+@case('pcr')
+def _pcr(params):
+    o, _, _ = _window(params)
+    return lambda: oi_analytics.pcr(o)
+
+
+@case('history_append')
+def _history_append(params):
+    # One trading day and more: append `snapshots` evolving snapshots to a fresh history
+    rng = np.random.default_rng(params.seed)
+    option = synthetic_chain.option_chain(params.index, params.strikes, 1, seed=params.seed)
+    chains, start = [], datetime(2024, 1, 1, 9, 15)
+    for _ in range(params.snapshots):
+        chains.append(synthetic_chain.to_chain(option))
+        option = synthetic_chain.evolve(option, rng)
+    times = pd.date_range(start, periods=params.snapshots, freq='3min')
+
+    def append_all():
+        history = chain_history.ChainHistory()
+        for chain, at in zip(chains, times):
+            history.append(chain, at)
+        return history
+
+    return append_all
+
+
+@case('indicators_delta')
+def _indicators_delta(params):
+    # Refresh of the last daily bar of an IndicatorBook holding `snapshots` bars, after
+    # checking that its streaming indicators match the batch ones on those bars
+    rng = np.random.default_rng(params.seed)
+    dates = pd.bdate_range('2020-01-01', periods=params.snapshots)
+    bars = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))),
+                         'Volume': rng.lognormal(13, 0.5, len(dates))}, index=dates)
+    differences = indicators.check(bars)
+    if (differences > 1e-9).any():
+        raise AssertionError(f'streaming and batch indicators differ:\n{differences}')
+    book = indicators.IndicatorBook()
+    book.update('BENCH', bars)
+    return lambda: book.update('BENCH', bars)
+
+
+@case('table_styling')
+def _table_styling(params):
+    # Option Chain and OI Analysis tables of oichart.py rendered to HTML by the Styler
+    _, oi, _ = _window(params)
+
+    def render():
+        oi_render.chain_table(oi).to_html()
+        return oi_render.oi_analysis_table(oi).to_html()
+
+    return render
+
+
+@case('chart_rendering')
+def _chart_rendering(params):
+    # OI / OI change chart of oichart.py rendered to PNG
+    _, oi, cmp = _window(params)
+    return lambda: oi_render.oi_chart_png(oi, cmp)
+
+
+def run_case(name, params):
+    fn = CASES[name](params)
+    fn()  # warm-up (imports, caches)
+    timings = []
+    for _ in range(params.repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1000
+    return {
+        'repeat': params.repeat,
+        'min_ms': float(timings.min()),
+        'median_ms': float(np.median(timings)),
+        'mean_ms': float(timings.mean()),
+        'p95_ms': float(np.percentile(timings, 95)),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    # {case: median / baseline median} for cases present in both runs, and the regressed ones
+    ratios = {name: result['median_ms'] / baseline['results'][name]['median_ms']
+              for name, result in results.items()
+              if name in baseline.get('results', {}) and baseline['results'][name]['median_ms'] > 0}
+    regressions = sorted(name for name, ratio in ratios.items() if ratio > 1 + tolerance)
+    return ratios, regressions
+
+
+def latest_result(results_dir=RESULTS_DIR):
+    files = sorted(glob.glob(os.path.join(results_dir, '*.json')))
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard hot paths on synthetic option chains')
+    parser.add_argument('--index', default='NIFTY', choices=sorted(synthetic_chain.SPOTS))
+    parser.add_argument('--strikes', type=int, default=200, help='strikes per expiry')
+    parser.add_argument('--expiries', type=int, default=4)
+    parser.add_argument('--snapshots', type=int, default=1000, help='snapshots for history_append')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--only', help='comma separated case names')
+    parser.add_argument('--baseline', help='result JSON to compare with (default: latest run)')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed median slowdown (0.2 = 20%%)')
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    params = parser.parse_args(argv)
+
+    names = params.only.split(',') if params.only else list(CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    baseline_path = params.baseline or latest_result(params.results_dir)
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in names:
+        results[name] = run_case(name, params)
+        print(f"{name:<16} median {results[name]['median_ms']:9.3f} ms   p95 {results[name]['p95_ms']:9.3f} ms")
+
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__},
+        'params': {key: value for key, value in vars(params).items()
+                   if key in ('index', 'strikes', 'expiries', 'snapshots', 'repeat', 'seed')},
+        'results': results,
+    }
+    regressions = []
+    if baseline is not None:
+        ratios, regressions = compare(results, baseline, params.tolerance)
+        run['baseline'] = {'file': baseline_path, 'commit': baseline.get('commit'), 'ratios': ratios,
+                           'regressions': regressions}
+        if baseline.get('params') != run['params']:
+            print(f"note: baseline {baseline_path} was run with different parameters")
+        for name, ratio in ratios.items():
+            flag = '  REGRESSION' if name in regressions else ''
+            print(f"{name:<16} {ratio:6.2f}x vs baseline{flag}")
+
+    os.makedirs(params.results_dir, exist_ok=True)
+    path = os.path.join(params.results_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{run['commit'] or 'local'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"results written to {path}")
+    return 1 if regressions and params.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
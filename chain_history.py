@@ -0,0 +1,329 @@
+# Intraday history of option-chain snapshots per index/expiry, kept as strike-aligned
+# numpy matrices (time x strike) and updated incrementally from the snapshot poller.
+# Provides OI build-up per interval, per-contract indicators (VWAP, RSI, averages) and
+# the intraday PCR of several strike windows.
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+import snapshots
+
+indian_tz = pytz.timezone('Asia/Kolkata')
+
+SIDES = ('CE', 'PE')
+
+# PCR windows: +/- n strikes around the ATM strike, next to the whole chain
+PCR_ATM_STRIKES = (5, 10)
+
+# Price change and OI change between two snapshots -> OI build-up
+BUILDUP_LABELS = np.array(['', 'Long Build-up', 'Short Build-up', 'Short Covering', 'Long Unwinding'])
+
+
+def classify_buildup(price_change, oi_change):
+    """
+    Build-up code for arrays of price/OI changes of any shape (0 = no change/unknown):
+    price up + OI up = long build-up, price down + OI up = short build-up,
+    price up + OI down = short covering, price down + OI down = long unwinding.
+    """
+    price_up, price_down = price_change > 0, price_change < 0
+    oi_up, oi_down = oi_change > 0, oi_change < 0
+    return np.select(
+        [price_up & oi_up, price_down & oi_up, price_up & oi_down, price_down & oi_down],
+        [1, 2, 3, 4], default=0
+    ).astype(np.int8)
+
+
+def classify_history(ltp, oi):
+    # Build-up code of every interval for every strike of a (time x strike) history
+    return classify_buildup(np.diff(ltp, axis=0), np.diff(oi, axis=0))
+
+
+class ChainHistory:
+    """
+    Per-contract (strike, CE/PE) intraday series: LTP, OI, traded volume per interval
+    and an option VWAP, kept as time x strike matrices. Every append updates the
+    VWAP incrementally and evaluates the contract indicators for all strikes at once.
+    """
+
+    MATRICES = ('ltp', 'oi', 'volume', 'vwap', 'buildup')
+
+    def __init__(self, capacity=256, rsi_window=14, avg_window=20):
+        self.strikes = pd.Index([], dtype=float, name='Strike_Price')
+        self.times = []
+        self.rsi_window = rsi_window
+        self.avg_window = avg_window
+        self._capacity = capacity
+        for name in self.MATRICES:
+            setattr(self, name, {side: self._empty(name, capacity, 0) for side in SIDES})
+        # running sums of the option VWAP and the last cumulative day volume per contract
+        self._pv = {side: np.zeros(0) for side in SIDES}
+        self._v = {side: np.zeros(0) for side in SIDES}
+        self._day_volume = {side: np.full(0, np.nan) for side in SIDES}
+        self.indicators = {side: pd.DataFrame() for side in SIDES}
+
+    @staticmethod
+    def _empty(name, rows, columns):
+        if name == 'buildup':
+            return np.zeros((rows, columns), dtype=np.int8)
+        return np.full((rows, columns), np.nan)
+
+    def __len__(self):
+        return len(self.times)
+
+    def _add_strikes(self, strikes):
+        # New strikes get an empty (NaN) history so they are not classified until seen twice
+        new = strikes.difference(self.strikes)
+        if new.empty:
+            return
+        merged = self.strikes.append(new).sort_values()
+        order = merged.get_indexer(self.strikes)
+        for name in self.MATRICES:
+            store = getattr(self, name)
+            for side in SIDES:
+                grown = self._empty(name, self._capacity, len(merged))
+                grown[:, order] = store[side]
+                store[side] = grown
+        for store, fill in ((self._pv, 0.0), (self._v, 0.0), (self._day_volume, np.nan)):
+            for side in SIDES:
+                grown = np.full(len(merged), fill)
+                grown[order] = store[side]
+                store[side] = grown
+        self.strikes = merged
+
+    def _grow(self):
+        self._capacity *= 2
+        for name in self.MATRICES:
+            store = getattr(self, name)
+            for side in SIDES:
+                grown = self._empty(name, self._capacity, len(self.strikes))
+                grown[:len(self.times)] = store[side][:len(self.times)]
+                store[side] = grown
+
+    def append(self, chain, at):
+        # Add one snapshot, classify the interval it closes and update the indicators
+        self._add_strikes(pd.Index(chain.index.astype(float)))
+        if len(self.times) == self._capacity:
+            self._grow()
+        t = len(self.times)
+        chain = chain.set_axis(chain.index.astype(float)).reindex(self.strikes)
+        for side in SIDES:
+            ltp = self.ltp[side][t] = chain[f'{side}_LTP'].to_numpy(dtype=float)
+            oi = self.oi[side][t] = chain[f'{side}_OI'].to_numpy(dtype=float)
+            # traded volume in this interval (NSE volume is cumulative for the day);
+            # without volume in the chain the absolute OI change is used instead
+            if f'{side}_VOLUME' in chain.columns:
+                day_volume = chain[f'{side}_VOLUME'].to_numpy(dtype=float)
+                volume = np.clip(day_volume - self._day_volume[side], 0, None)
+                volume = np.where(np.isnan(self._day_volume[side]), day_volume, volume)
+                self._day_volume[side] = day_volume
+            elif t > 0:
+                volume = np.abs(oi - self.oi[side][t - 1])
+            else:
+                volume = np.zeros(len(self.strikes))
+            volume = np.nan_to_num(volume)
+            self.volume[side][t] = volume
+            traded = np.isfinite(ltp)
+            self._pv[side] += np.where(traded, ltp * volume, 0)
+            self._v[side] += np.where(traded, volume, 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.vwap[side][t] = np.where(self._v[side] > 0, self._pv[side] / self._v[side], ltp)
+            if t > 0:
+                self.buildup[side][t] = classify_buildup(ltp - self.ltp[side][t - 1], oi - self.oi[side][t - 1])
+        self.times.append(at)
+        for side in SIDES:
+            self.indicators[side] = self._contract_indicators(side)
+
+    def _contract_indicators(self, side):
+        # Latest indicators of every contract of one side, from its own time series
+        n = len(self.times)
+        ltp = self.ltp[side][:n]
+        recent = ltp[max(0, n - 1 - self.rsi_window):n]
+        delta = np.diff(recent, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if len(delta):
+                avg_gain = np.nanmean(np.where(delta > 0, delta, 0), axis=0)
+                avg_loss = np.nanmean(np.where(delta < 0, -delta, 0), axis=0)
+                rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+            else:
+                rsi = np.full(len(self.strikes), np.nan)
+            window = slice(max(0, n - self.avg_window), n)
+            avg_volume = np.nanmean(self.volume[side][window], axis=0)
+            avg_oi = np.nanmean(self.oi[side][window], axis=0)
+
+        vwap = self.vwap[side][:n]
+        cross_up = np.zeros(len(self.strikes), dtype=bool)
+        if n > 1:
+            cross_up = (ltp[-2] <= vwap[-2]) & (ltp[-1] > vwap[-1])
+        frame = pd.DataFrame({
+            'LTP': ltp[-1],
+            'OI': self.oi[side][n - 1],
+            'VWAP': vwap[-1],
+            'RSI': rsi,
+            'Volume': self.volume[side][n - 1],
+            'Avg_Volume': avg_volume,
+            'Avg_OI': avg_oi,
+            'VWAP_Cross_Up': cross_up,
+        }, index=self.strikes)
+        frame['Conditions_Met'] = ((frame['LTP'] > frame['VWAP']) &
+                                   (frame['Volume'] > 1.5 * frame['Avg_Volume']) &
+                                   (frame['RSI'] > 60) &
+                                   (frame['OI'] < frame['Avg_OI']) &
+                                   (abs(frame['OI'] - frame['Avg_OI']) > 0.01 * frame['Avg_OI']))
+        return frame
+
+    def series(self, strike, side='CE'):
+        # Intraday time series of one contract
+        n = len(self.times)
+        column = self.strikes.get_loc(float(strike))
+        return pd.DataFrame({
+            'LTP': self.ltp[side][:n, column],
+            'OI': self.oi[side][:n, column],
+            'Volume': self.volume[side][:n, column],
+            'VWAP': self.vwap[side][:n, column],
+        }, index=pd.DatetimeIndex(self.times, name='Time'))
+
+    def buildup_table(self, side='CE', every=None, strikes=None):
+        """
+        Strike x time table of build-up labels. By default one column per snapshot
+        interval; with `every` (e.g. '15min') snapshots are sampled at the end of
+        each bucket and the bucket-to-bucket change is classified.
+        """
+        n = len(self.times)
+        if n < 2:
+            return pd.DataFrame(index=self.strikes)
+        if every is None:
+            codes = self.buildup[side][1:n]
+            columns = self.times[1:n]
+        else:
+            rows = pd.Series(np.arange(n), index=pd.DatetimeIndex(self.times)).resample(every).last().dropna()
+            rows = rows.to_numpy(dtype=int)
+            codes = classify_history(self.ltp[side][rows], self.oi[side][rows])
+            columns = [self.times[i] for i in rows[1:]]
+        table = pd.DataFrame(BUILDUP_LABELS[codes].T, index=self.strikes,
+                             columns=[at.strftime('%H:%M') for at in columns])
+        if strikes is not None:
+            table = table.reindex(pd.Index(strikes, dtype=float))
+        return table
+
+
+def _ratio(puts, calls):
+    return puts / calls if calls else np.nan
+
+
+class PCRHistory:
+    """
+    Intraday put-call ratios of one index/expiry in a fixed-size ring buffer, one row per
+    snapshot: spot, PCR of the whole chain, PCR of +/- n strikes around ATM for every n
+    of atm_strikes and the PCR of the change in OI. An append costs one pass over the
+    strikes; a query copies at most `capacity` rows, however long the day has been.
+    """
+
+    def __init__(self, capacity=512, atm_strikes=PCR_ATM_STRIKES):
+        self.atm_strikes = atm_strikes
+        self.columns = ['Spot', 'PCR', *[f'PCR_ATM{n}' for n in atm_strikes], 'CHG_OI_PCR']
+        self._times = np.zeros(capacity, dtype='datetime64[s]')
+        self._values = np.full((capacity, len(self.columns)), np.nan)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, chain, spot, at):
+        if not chain.index.is_monotonic_increasing:
+            chain = chain.sort_index()
+        ce, pe = chain['CE_OI'].to_numpy(dtype=float), chain['PE_OI'].to_numpy(dtype=float)
+        atm = int(np.abs(chain.index.to_numpy(dtype=float) - spot).argmin()) if len(chain) else 0
+        windows = [slice(max(0, atm - n), atm + n + 1) for n in self.atm_strikes]
+        self._values[self._next] = [
+            spot,
+            _ratio(np.nansum(pe), np.nansum(ce)),
+            *[_ratio(np.nansum(pe[w]), np.nansum(ce[w])) for w in windows],
+            _ratio(chain['PE_CHG_OI'].sum(), chain['CE_CHG_OI'].sum()),
+        ]
+        self._times[self._next] = np.datetime64(at, 's')
+        self._next = (self._next + 1) % len(self._times)
+        self._count = min(self._count + 1, len(self._times))
+
+    def series(self, rolling=None):
+        """
+        Rows of the buffer oldest first, indexed by time. With `rolling` (snapshots) every
+        PCR column also gets its rolling mean and a band of one rolling std around it.
+        """
+        rows = (np.arange(self._count) + self._next - self._count) % len(self._times)
+        frame = pd.DataFrame(self._values[rows], columns=self.columns,
+                             index=pd.DatetimeIndex(self._times[rows], name='Time'))
+        if rolling:
+            for column in self.columns[1:]:
+                window = frame[column].rolling(rolling, min_periods=1)
+                mean, std = window.mean(), window.std().fillna(0)
+                frame[f'{column}_Mean'] = mean
+                frame[f'{column}_Upper'] = mean + std
+                frame[f'{column}_Lower'] = mean - std
+        return frame
+
+
+class HistoryStore:
+    # One ChainHistory and PCRHistory per (index, expiry), reset at the start of each trading day
+    def __init__(self):
+        self._histories = {}
+        self._pcr = {}
+        self._days = {}
+        self._lock = threading.Lock()
+
+    def on_snapshots(self, snaps):
+        with self._lock:
+            for key, snap in snaps.items():
+                at = datetime.fromtimestamp(snap.fetched_at, indian_tz).replace(tzinfo=None)
+                if self._days.get(key) != at.date():
+                    self._histories[key] = ChainHistory()
+                    self._pcr[key] = PCRHistory()
+                    self._days[key] = at.date()
+                self._histories[key].append(snap.chain, at)
+                self._pcr[key].append(snap.chain, snap.spot, at)
+
+    def get(self, index, expiry):
+        with self._lock:
+            return self._histories.get((index, expiry))
+
+    def contract_indicators(self, index, expiry, side='CE'):
+        with self._lock:
+            history = self._histories.get((index, expiry))
+            return pd.DataFrame() if history is None else history.indicators[side].copy()
+
+    def contract_series(self, index, expiry, strike, side='CE'):
+        with self._lock:
+            history = self._histories.get((index, expiry))
+            return pd.DataFrame() if history is None else history.series(strike, side)
+
+    def buildup_table(self, index, expiry, side='CE', every=None, strikes=None):
+        with self._lock:
+            history = self._histories.get((index, expiry))
+            if history is None:
+                return pd.DataFrame()
+            return history.buildup_table(side, every=every, strikes=strikes)
+
+    def pcr_series(self, index, expiry, rolling=None):
+        with self._lock:
+            history = self._pcr.get((index, expiry))
+            return pd.DataFrame() if history is None else history.series(rolling)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store(start=True):
+    # Start recording snapshot history once per server process; start=False leaves starting
+    # the poller to the caller, which registers its own listener after this one first
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+            snapshots.get_poller().add_listener(_store.on_snapshots)
+        if start:
+            snapshots.get_poller().start()
+        return _store
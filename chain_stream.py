@@ -0,0 +1,168 @@
+# WebSocket push of option-chain changes: a client subscribes to index/expiry pairs and
+# gets the full strike window once, then after every new snapshot only the strikes whose
+# OI, change in OI, LTP or signal changed. Messages are binary (see encode_frame) and the
+# connection negotiates permessage-deflate, so traffic follows what changed, not chain size.
+#
+# Client -> server (text):   {"subscribe": [["NIFTY", "26-Dec-2024"]]}   {"unsubscribe": [...]}
+# Server -> client (binary): encode_frame(...), one per subscribed pair and snapshot
+# Only polled pairs can be subscribed, at most MAX_SUBSCRIPTIONS per connection.
+#
+# Browsers may connect from the API's own host or from an origin in API_ALLOWED_ORIGINS
+# (comma separated, e.g. "https://board.example.com"; "*" allows any origin).
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+import tornado.ioloop
+import tornado.websocket
+
+import metrics
+
+COLUMNS = ['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP']
+SIGNALS = ['HOLD', 'BUY CE', 'BUY PE']
+# index/expiry pairs one connection may subscribe to
+MAX_SUBSCRIPTIONS = int(os.environ.get('API_STREAM_MAX_SUBSCRIPTIONS', 16))
+ALLOWED_ORIGINS = {origin.strip().rstrip('/') for origin in os.environ.get('API_ALLOWED_ORIGINS', '').split(',')
+                   if origin.strip()}
+
+_sent = [0]
+metrics.register_counter('option_board_stream_messages_total', 'WebSocket chain messages sent', lambda: _sent[0])
+
+
+def encode_frame(kind, meta, rows, removed=()):
+    """
+    Binary message: 4-byte little-endian header length, JSON header (meta, kind 'full' or
+    'delta', columns, signal names, row count, strikes removed from the window), then the
+    rows as little-endian float64, one row = Strike_Price, COLUMNS, signal code.
+    """
+    header = json.dumps({**meta, 'kind': kind, 'columns': ['Strike_Price', *COLUMNS, 'Signal'],
+                         'signals': SIGNALS, 'rows': len(rows), 'removed': [float(s) for s in removed]},
+                        separators=(',', ':')).encode()
+    values = np.empty((len(rows), len(COLUMNS) + 2), dtype='<f8')
+    values[:, 0] = rows.index.to_numpy(dtype=float)
+    values[:, 1:] = rows.to_numpy(dtype=float)
+    return struct.pack('<I', len(header)) + header + values.tobytes()
+
+
+def decode_frame(message):
+    # (header, DataFrame indexed by strike with COLUMNS and the Signal names) of one message
+    size, = struct.unpack_from('<I', message)
+    header = json.loads(message[4:4 + size])
+    values = np.frombuffer(message, dtype='<f8', offset=4 + size).reshape(header['rows'], len(header['columns']))
+    rows = pd.DataFrame(values[:, 1:], index=pd.Index(values[:, 0], name='Strike_Price'), columns=header['columns'][1:])
+    rows['Signal'] = np.array(header['signals'])[rows['Signal'].to_numpy(dtype=int)]
+    return header, rows
+
+
+def _pairs(value):
+    # True for a list of [index, expiry] string pairs
+    return isinstance(value, list) and all(
+        isinstance(pair, list) and len(pair) == 2 and all(isinstance(part, str) for part in pair)
+        for pair in value)
+
+
+class ChainStream:
+    """
+    Latest full frame per index/expiry and the subscribed websocket handlers. `update`
+    runs on the poller thread; every message is encoded once and handed to each
+    subscriber's own IOLoop.
+    """
+
+    def __init__(self):
+        self._last = {}
+        self._full = {}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, meta, oi):
+        # oi: strike window with a Signal column, as rendered by the analytics API
+        frame = oi[COLUMNS].astype(float)
+        frame['Signal'] = pd.Categorical(oi['Signal'], categories=SIGNALS).codes.astype(float)
+        with metrics.timer('stream_encode', *key):
+            previous = self._last.get(key)
+            if previous is None:
+                changed, removed = frame, []
+            else:
+                before = previous.reindex(frame.index)
+                changed = frame[(frame.ne(before) & ~(frame.isna() & before.isna())).any(axis=1)]
+                removed = previous.index.difference(frame.index)
+            full = encode_frame('full', meta, frame)
+            delta = encode_frame('delta', meta, changed, removed)
+        with self._lock:
+            self._last[key] = frame
+            self._full[key] = full
+            subscribers = list(self._subscribers.get(key, ()))
+        for handler in subscribers:
+            handler.loop.add_callback(handler.push, delta)
+
+    def subscribe(self, handler, key):
+        # Returns the full frame to send first; KeyError when the pair is not polled
+        with self._lock:
+            full = self._full[key]
+            self._subscribers.setdefault(key, set()).add(handler)
+            return full
+
+    def unsubscribe(self, handler, key=None):
+        with self._lock:
+            for subscribed in [key] if key is not None else list(self._subscribers):
+                handlers = self._subscribers.get(subscribed)
+                if handlers is not None:
+                    handlers.discard(handler)
+                    if not handlers:
+                        del self._subscribers[subscribed]
+
+
+class StreamHandler(tornado.websocket.WebSocketHandler):
+    def initialize(self, stream):
+        self.stream = stream
+        self.loop = None
+        self.keys = set()
+
+    def get_compression_options(self):
+        return {}
+
+    def check_origin(self, origin):
+        if '*' in ALLOWED_ORIGINS or origin.rstrip('/') in ALLOWED_ORIGINS:
+            return True
+        return super().check_origin(origin)
+
+    def open(self):
+        self.loop = tornado.ioloop.IOLoop.current()
+
+    def on_message(self, message):
+        try:
+            request = json.loads(message)
+        except ValueError:
+            self.close(1003, 'expected JSON')
+            return
+        if not isinstance(request, dict) or not all(_pairs(request.get(action, []))
+                                                    for action in ('subscribe', 'unsubscribe')):
+            self.close(1003, 'expected {"subscribe": [[index, expiry], ...]}')
+            return
+        for index, expiry in request.get('unsubscribe', ()):
+            self.stream.unsubscribe(self, (index, expiry))
+            self.keys.discard((index, expiry))
+        for index, expiry in request.get('subscribe', ()):
+            if (index, expiry) not in self.keys and len(self.keys) >= MAX_SUBSCRIPTIONS:
+                self.close(1008, f'at most {MAX_SUBSCRIPTIONS} subscriptions')
+                return
+            try:
+                full = self.stream.subscribe(self, (index, expiry))
+            except KeyError:
+                self.close(1003, f'{index} {expiry} is not polled')
+                return
+            self.keys.add((index, expiry))
+            self.push(full)
+
+    def push(self, message):
+        try:
+            self.write_message(message, binary=True)
+            _sent[0] += 1
+        except tornado.websocket.WebSocketClosedError:
+            self.stream.unsubscribe(self)
+
+    def on_close(self):
+        self.stream.unsubscribe(self)
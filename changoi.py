@@ -1,26 +1,23 @@
 # Import all important libraries
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
+from nse_client import derivatives, capital_market
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
 import time
 import pytz
+import session_store
 
-# Initialize global variables to store captured data
-if 'signal_data' not in st.session_state:
-    st.session_state.signal_data = []
-if 'buy_signal_data' not in st.session_state:
-    st.session_state.buy_signal_data = []
-if 'capture_times' not in st.session_state:
-    st.session_state.capture_times = []
+# Initialize session variables to store captured data (capped, oldest rows evicted)
+session_store.row_buffer('signal_data')
+session_store.row_buffer('buy_signal_data')
+session_store.row_buffer('capture_times')
 
 # Function to capture buy/sell signals
-def capture_signals(index, exp):
+def capture_signals(index, ex):
     try:
-        option = derivatives.nse_live_option_chain(index, exp)
+        option = snapshots.option_chain(index, ex)
         o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
 
         # Generate signals
@@ -73,16 +70,15 @@ tab1, tab2, tab3, tab4 = st.tabs(["Option Chain", "OI Analysis", "Ratio Strategy
 # Create sidebar to select index instrument and for expiry day selection
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
 ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
 
 # Capture signals every 3 minutes
-capture_signals(index, exp)
+capture_signals(index, ex)
 
 # Tab 1: Option Chain
 with tab1:
     st.subheader('Option Chain')
     try:
-        option = derivatives.nse_live_option_chain(index, exp)
+        option = snapshots.option_chain(index, ex)
         o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
 
         # Calculating spot price and setting up range for option analysis
@@ -110,6 +106,7 @@ with tab1:
 with tab2:
     st.subheader('Open Interest Analysis')
     try:
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(2, 1)
         ax[0].bar(oi.index, oi['CALLS_OI'], color='blue', width=20)
         ax[0].bar(oi.index - 10, oi['PUTS_OI'], color='red', width=20)
@@ -0,0 +1,85 @@
+# Holt-Winters price forecasts with cached model parameters: a ticker is only refit when
+# new bars arrive, and then warm-started from the parameters fitted earlier
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Re-optimize from scratch once this many bars arrived since the last full fit
+REFIT_EVERY = 20
+
+# Only the latest entry per (symbol, interval) is kept, so the caches stay as small as
+# the universe however long the server runs
+# (symbol, interval) -> {'first_bar': ..., 'params': ..., 'fitted_bars': ...}
+_params = {}
+# (symbol, interval) -> ((first bar, last bar, periods), forecast values)
+_forecasts = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _executor
+
+
+def fit_forecast(close, periods=5, params=None):
+    # Full fit when params is None, otherwise reuse the fitted smoothing parameters and
+    # initial states, which only runs the filter over the series (no optimizer).
+    # statsmodels is imported here so pages load without it until the first forecast
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    if params is None:
+        fit = ExponentialSmoothing(close, trend='add', seasonal=None).fit()
+    else:
+        model = ExponentialSmoothing(close, trend='add', seasonal=None, initialization_method='known',
+                                     initial_level=params['initial_level'], initial_trend=params['initial_trend'])
+        fit = model.fit(smoothing_level=params['smoothing_level'], smoothing_trend=params['smoothing_trend'],
+                        optimized=False)
+    fitted = {name: float(fit.params[name]) for name in ('smoothing_level', 'smoothing_trend', 'initial_level', 'initial_trend')}
+    return np.asarray(fit.forecast(periods)), fitted
+
+
+def forecast_many(closes, interval='1d', periods=5):
+    """
+    Forecasts for {symbol: close series}. Series whose last bar has already been
+    forecast are served from the cache; the rest are fitted in parallel.
+    """
+    results, jobs = {}, {}
+    for symbol, close in closes.items():
+        close = close.dropna()
+        if close.empty:
+            continue
+        key = (symbol, interval)
+        bars = (close.index[0], close.index[-1], periods)
+        cached_forecast = _forecasts.get(key)
+        if cached_forecast is not None and cached_forecast[0] == bars:
+            results[symbol] = cached_forecast[1]
+            continue
+        cached = _params.get(key)
+        warm = (cached is not None and cached['first_bar'] == close.index[0]
+                and len(close) - cached['fitted_bars'] < REFIT_EVERY)
+        jobs[symbol] = (close, key, bars, cached['params'] if warm else None, warm)
+
+    if jobs:
+        executor = _get_executor()
+        futures = {symbol: executor.submit(fit_forecast, job[0].to_numpy(dtype=float), periods, job[3])
+                   for symbol, job in jobs.items()}
+        for symbol, future in futures.items():
+            close, key, bars, params, warm = jobs[symbol]
+            values, fitted = future.result()
+            if not warm:
+                _params[key] = {'first_bar': close.index[0], 'params': fitted, 'fitted_bars': len(close)}
+            results[symbol] = pd.Series(values)
+            _forecasts[key] = (bars, results[symbol])
+    return results
+
+
+# Forecast Prices
+def forecast_prices(data, periods=5, symbol='', interval='1d'):
+    return forecast_many({symbol: data['Close']}, interval=interval, periods=periods)[symbol]
@@ -0,0 +1,112 @@
+# Import-time profile of the Streamlit pages: runs the module-level imports of each page
+# under `python -X importtime` after `import streamlit` (which every page pays anyway) and
+# reports what the page itself adds before its first widget renders, heaviest first.
+#
+#   python import_profile.py                      # every page in the repo
+#   python import_profile.py oichart.py screener.py --top 10 --json profile.json
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+BASELINE = 'streamlit'
+
+
+def _calls_streamlit(node):
+    # True when the statement calls st.<something>, e.g. renders a widget
+    for call in ast.walk(node):
+        if isinstance(call, ast.Call):
+            func = call.func
+            while isinstance(func, ast.Attribute):
+                func = func.value
+            if isinstance(func, ast.Name) and func.id == 'st' and func is not call.func:
+                return True
+    return False
+
+
+def module_imports(path):
+    # Import statements at module level up to the first st.* call outside a definition,
+    # i.e. the ones that run before the page renders anything
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    imports = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(ast.unparse(node))
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and _calls_streamlit(node):
+            break
+    return imports
+
+
+def pages(root='.'):
+    # Scripts that import streamlit at module level, i.e. the app and its pages/
+    found = []
+    for path in sorted(glob.glob(os.path.join(root, '*.py')) + glob.glob(os.path.join(root, 'pages', '*.py'))):
+        try:
+            imports = module_imports(path)
+        except SyntaxError:
+            continue
+        if any(line.startswith('import streamlit') for line in imports):
+            found.append(path)
+    return found
+
+
+def parse_importtime(stderr):
+    # [(depth, package, self_us, cumulative_us)] in the order -X importtime prints them
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(statements, cwd='.'):
+    """
+    Top-level packages imported by `statements` that `import streamlit` did not already
+    load, as {package: cumulative ms}. Raises RuntimeError when the imports fail.
+    """
+    code = '\n'.join([f'import {BASELINE}', *statements])
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = parse_importtime(result.stderr)
+    top_level = [(name, cumulative) for depth, name, _, cumulative in rows if depth == 0]
+    names = [name for name, _ in top_level]
+    start = names.index(BASELINE) + 1 if BASELINE in names else 0
+    return {name: cumulative / 1000 for name, cumulative in top_level[start:]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import-time profile of the Streamlit pages')
+    parser.add_argument('scripts', nargs='*', help='page scripts (default: every page in the repo)')
+    parser.add_argument('--top', type=int, default=5, help='heaviest packages listed per page')
+    parser.add_argument('--json', help='write the report as JSON')
+    params = parser.parse_args(argv)
+
+    report = {}
+    for path in params.scripts or pages():
+        try:
+            packages = profile(module_imports(path))
+        except (RuntimeError, SyntaxError) as e:
+            report[path] = {'error': str(e)}
+            print(f'{path:<24} failed: {e}')
+            continue
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:params.top]
+        report[path] = {'import_ms': round(sum(packages.values()), 1),
+                        'heaviest': {name: round(ms, 1) for name, ms in heaviest}}
+        print(f"{path:<24} {report[path]['import_ms']:8.1f} ms   "
+              + ', '.join(f'{name} {ms:.0f}' for name, ms in heaviest))
+    if params.json:
+        with open(params.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# Technical indicators for OHLCV series in two modes: streaming objects that keep O(1)
+# state per symbol and update on every new bar, and vectorized batch functions for
+# backfills. Both modes give the same values bar for bar.
+import copy
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['VWAP', 'Average Volume', 'Unusual Volume', 'Return', 'RSI']
+
+
+# ---- batch mode ----
+
+def vwap(close, volume):
+    return (close * volume).cumsum() / volume.cumsum()
+
+
+def rolling_mean(series, window=20):
+    return series.rolling(window=window).mean()
+
+
+def unusual_volume(volume, window=20, spike=2.0):
+    return volume > spike * rolling_mean(volume, window)
+
+
+def returns(close):
+    return close.pct_change()
+
+
+def rsi(close, window=14):
+    # Simple-average RSI, same definition as calculate_rsi in alertoptions.py
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).fillna(0)
+    loss = (-delta.where(delta < 0, 0)).fillna(0)
+    avg_gain = gain.rolling(window=window, min_periods=1).mean()
+    avg_loss = loss.rolling(window=window, min_periods=1).mean()
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def compute_batch(bars, volume_window=20, spike=2.0, rsi_window=14):
+    return pd.DataFrame({
+        'VWAP': vwap(bars['Close'], bars['Volume']),
+        'Average Volume': rolling_mean(bars['Volume'], volume_window),
+        'Unusual Volume': unusual_volume(bars['Volume'], volume_window, spike),
+        'Return': returns(bars['Close']),
+        'RSI': rsi(bars['Close'], rsi_window),
+    }, index=bars.index)
+
+
+# ---- streaming mode ----
+
+class StreamingVWAP:
+    def __init__(self):
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    @property
+    def value(self):
+        return self.price_volume / self.volume if self.volume else math.nan
+
+    def update(self, price, volume):
+        self.price_volume += price * volume
+        self.volume += volume
+        return self.value
+
+
+class RollingMean:
+    # Mean of the last `window` values (nan until the window is full)
+    def __init__(self, window=20, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    @property
+    def value(self):
+        return self.total / len(self.values) if len(self.values) >= max(self.min_periods, 1) else math.nan
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        return self.value
+
+
+class UnusualVolume:
+    def __init__(self, window=20, spike=2.0):
+        self.average = RollingMean(window)
+        self.spike = spike
+
+    def update(self, volume):
+        average = self.average.update(volume)
+        return average, volume > self.spike * average  # nan compares False
+
+
+class Returns:
+    def __init__(self):
+        self.last = None
+
+    def update(self, price):
+        result = price / self.last - 1 if self.last else math.nan
+        self.last = price
+        return result
+
+
+class RSI:
+    def __init__(self, window=14):
+        self.last = None
+        self.gain = RollingMean(window, min_periods=1)
+        self.loss = RollingMean(window, min_periods=1)
+
+    def update(self, price):
+        delta = 0.0 if self.last is None else price - self.last
+        self.last = price
+        gain = self.gain.update(max(delta, 0.0))
+        loss = self.loss.update(max(-delta, 0.0))
+        if loss == 0:
+            return 100.0 if gain > 0 else math.nan
+        return 100 - (100 / (1 + gain / loss))
+
+
+class SymbolIndicators:
+    def __init__(self, volume_window=20, spike=2.0, rsi_window=14):
+        self.vwap = StreamingVWAP()
+        self.unusual_volume = UnusualVolume(volume_window, spike)
+        self.returns = Returns()
+        self.rsi = RSI(rsi_window)
+        self.last_bar = None
+
+    def update(self, close, volume, at=None):
+        average, unusual = self.unusual_volume.update(volume)
+        self.last_bar = at
+        return {
+            'VWAP': self.vwap.update(close, volume),
+            'Average Volume': average,
+            'Unusual Volume': unusual,
+            'Return': self.returns.update(close),
+            'RSI': self.rsi.update(close),
+        }
+
+
+class IndicatorBook:
+    """
+    Streaming indicators for many symbols, fed with each symbol's stored bars (same first
+    bars, new ones appended). Only the bars after the last one seen are applied; that last
+    bar is applied again from a checkpoint, since a refreshed store revises an incomplete
+    last bar. Bars that do not extend what was seen start the symbol over.
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self.symbols = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, bars):
+        # Indicator columns of every bar, as compute_batch gives them
+        with self._lock:
+            entry = self.symbols.get(symbol)
+            if entry is None or len(bars) < len(entry['rows']) or \
+                    not bars.index[:len(entry['rows'])].equals(entry['rows'].index):
+                entry = self.symbols[symbol] = {'state': SymbolIndicators(**self.params),
+                                                'checkpoint': SymbolIndicators(**self.params),
+                                                'rows': _frame([], bars.index[:0])}
+            kept = entry['rows'].iloc[:-1]
+            new = bars.iloc[len(kept):]
+            state = checkpoint = copy.deepcopy(entry['checkpoint'])
+            rows = []
+            for at, close, volume in zip(new.index, new['Close'].to_numpy(dtype=float),
+                                         new['Volume'].to_numpy(dtype=float)):
+                if len(rows) == len(new) - 1:
+                    checkpoint = copy.deepcopy(state)
+                rows.append(state.update(close, volume, at))
+            rows = _frame(rows, new.index)
+            entry.update(state=state, checkpoint=checkpoint, rows=rows if kept.empty else pd.concat([kept, rows]))
+            return entry['rows']
+
+    def latest(self):
+        # Current VWAP and average volume of every symbol
+        with self._lock:
+            return pd.DataFrame({
+                symbol: {'Last Bar': entry['state'].last_bar, 'VWAP': entry['state'].vwap.value,
+                         'Average Volume': entry['state'].unusual_volume.average.value}
+                for symbol, entry in self.symbols.items()
+            }).T
+
+
+def _frame(rows, index):
+    return pd.DataFrame(rows, index=index, columns=COLUMNS).astype({'Unusual Volume': bool})
+
+
+def check(bars, **params):
+    """
+    Largest relative difference per column between the streaming and the batch indicators
+    of the same bars, fed to an IndicatorBook in two parts; all values should be ~0 (inf
+    when only one of the two modes is nan).
+    """
+    book = IndicatorBook(**params)
+    book.update('check', bars.iloc[:len(bars) // 2])
+    streamed = book.update('check', bars)
+    batch = compute_batch(bars, **params)
+    result = {}
+    for column in COLUMNS:
+        a, b = streamed[column].to_numpy(dtype=float), batch[column].to_numpy(dtype=float)
+        difference = np.where(np.isnan(a) != np.isnan(b), np.inf, np.abs(a - b) / np.maximum(np.abs(b), 1.0))
+        result[column] = float(np.nanmax(difference, initial=0.0))
+    return pd.Series(result)
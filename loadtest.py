@@ -0,0 +1,293 @@
+# Multi-session load test for the Streamlit dashboards. Starts the NSE stand-in and the
+# app (or attaches to a running one), opens N websocket sessions that speak the Streamlit
+# browser protocol, and drives refreshes and index/expiry changes. Reports client-side
+# rerun latency percentiles, the app's own rerun timings (metrics endpoint), server CPU
+# and RSS (Linux /proc) and the requests that reached the upstream data source.
+#
+#   python loadtest.py --sessions 30 --duration 120
+#   python loadtest.py --url http://127.0.0.1:8501 --pid 12345 --sessions 10
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+import nse_standin
+
+# Share of the actions a simulated trader takes between two think times
+ACTIONS = {'refresh': 0.6, 'expiry': 0.25, 'index': 0.15}
+INDEX_LABEL = 'Select index name'
+EXPIRY_LABEL = 'Select expiry date'
+
+
+class Session:
+    """
+    One simulated browser tab: keeps the widgets the app rendered (label -> id, options)
+    and the selected option of each, and sends rerun requests with those widget states.
+    A rerun is done at script_finished, or once no delta arrived for `settle` seconds
+    (the dashboards sleep before their auto refresh instead of finishing).
+    """
+
+    def __init__(self, url, rng, settle=1.0, timeout=60.0):
+        self.url = url
+        self.rng = rng
+        self.settle = settle
+        self.timeout = timeout
+        self.widgets = {}
+        self.values = {}
+        self.latencies = {action: [] for action in ACTIONS}
+        self.latencies['initial'] = []
+        self.errors = 0
+        self._messages = asyncio.Queue()
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, max_message_size=256 * 1024 * 1024,
+                                          on_message_callback=self._on_message, subprotocols=['streamlit'])
+
+    def _on_message(self, data):
+        self._messages.put_nowait((time.perf_counter(), data))
+
+    def _track(self, delta):
+        if delta.WhichOneof('type') != 'new_element' or delta.new_element.WhichOneof('type') != 'selectbox':
+            return
+        selectbox = delta.new_element.selectbox
+        self.widgets[selectbox.label] = (selectbox.id, list(selectbox.options))
+        self.values.setdefault(selectbox.id, selectbox.default)
+
+    async def rerun(self, action):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        for widget_id, value in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.int_value = value
+        while not self._messages.empty():
+            self._messages.get_nowait()
+        sent = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        last = None
+        while True:
+            try:
+                arrived, data = await asyncio.wait_for(self._messages.get(), self.settle if last else self.timeout)
+            except asyncio.TimeoutError:
+                break
+            if data is None:
+                raise ConnectionError('app closed the session')
+            forward = ForwardMsg.FromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta':
+                last = arrived
+                self._track(forward.delta)
+            elif kind == 'script_finished':
+                last = last or arrived
+                break
+        if last is None:
+            self.errors += 1
+        else:
+            self.latencies[action].append(last - sent)
+
+    def _select(self, label):
+        # Pick another option of a selectbox; the widget id of the expiry box changes with the index
+        if label not in self.widgets:
+            return False
+        widget_id, options = self.widgets[label]
+        if len(options) < 2:
+            return False
+        current = self.values.get(widget_id, 0)
+        self.values[widget_id] = int(self.rng.choice([i for i in range(len(options)) if i != current]))
+        return True
+
+    async def run(self, until, think):
+        await self.connect()
+        await self.rerun('initial')
+        while time.time() < until:
+            await asyncio.sleep(self.rng.exponential(think))
+            action = self.rng.choice(list(ACTIONS), p=list(ACTIONS.values()))
+            if action == 'index' and not self._select(INDEX_LABEL):
+                action = 'refresh'
+            elif action == 'expiry' and not self._select(EXPIRY_LABEL):
+                action = 'refresh'
+            try:
+                await self.rerun(action)
+            except ConnectionError:
+                self.errors += 1
+                await self.connect()
+        self.ws.close()
+
+
+class ProcessSampler:
+    # CPU % and RSS of one process from /proc, sampled every `every` seconds in a thread
+    def __init__(self, pid, every=1.0):
+        self.pid = pid
+        self.every = every
+        self.samples = []
+        self._stop = threading.Event()
+        self._ticks = os.sysconf('SC_CLK_TCK')
+
+    def _read(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        with open(f'/proc/{self.pid}/status') as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:')) / 1024
+        return time.time(), cpu, rss
+
+    def _run(self):
+        previous = self._read()
+        while not self._stop.wait(self.every):
+            try:
+                current = self._read()
+            except (OSError, StopIteration):
+                break
+            cpu_percent = 100 * (current[1] - previous[1]) / (current[0] - previous[0])
+            self.samples.append((cpu_percent, current[2]))
+            previous = current
+
+    def start(self):
+        threading.Thread(target=self._run, name='process-sampler', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        samples = np.array(self.samples) if self.samples else np.zeros((1, 2))
+        return {'cpu_mean_percent': float(samples[:, 0].mean()), 'cpu_max_percent': float(samples[:, 0].max()),
+                'rss_max_mb': float(samples[:, 1].max()), 'rss_last_mb': float(samples[-1, 1])}
+
+
+def start_app(app, port, env):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app, '--server.port', str(port), '--server.headless', 'true',
+         '--server.enableXsrfProtection', 'false', '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    health = f'http://127.0.0.1:{port}/_stcore/health'
+    for _ in range(120):
+        try:
+            with urllib.request.urlopen(health, timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'{app} did not come up on port {port}')
+
+
+def app_rerun_timings(metrics_url):
+    # Quantiles of the app's own 'rerun' stage from the Prometheus text, in ms
+    try:
+        with urllib.request.urlopen(metrics_url, timeout=2) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    timings = {}
+    for line in text.splitlines():
+        if line.startswith('option_board_stage_seconds{stage="rerun"') and 'quantile=' in line:
+            labels, value = line.rsplit(' ', 1)
+            quantile = labels.split('quantile="')[1].split('"')[0]
+            index = labels.split('index="')[1].split('"')[0]
+            timings.setdefault(index, {})[f'p{int(float(quantile) * 100)}_ms'] = round(float(value) * 1000, 1)
+    return timings
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0}
+    values = np.array(values) * 1000
+    return {'count': len(values), 'p50_ms': round(float(np.percentile(values, 50)), 1),
+            'p95_ms': round(float(np.percentile(values, 95)), 1), 'p99_ms': round(float(np.percentile(values, 99)), 1)}
+
+
+async def drive(url, params):
+    rng = np.random.default_rng(params.seed)
+    sessions = [Session(url, np.random.default_rng(rng.integers(1 << 31)), params.settle) for _ in range(params.sessions)]
+    until = time.time() + params.duration
+
+    async def ramped(i, session):
+        # spread the session starts over the ramp-up, like traders opening the page at 9:15
+        await asyncio.sleep(params.ramp * i / max(1, len(sessions)))
+        await session.run(until, params.think)
+
+    results = await asyncio.gather(*(ramped(i, s) for i, s in enumerate(sessions)), return_exceptions=True)
+    failed = [r for r in results if isinstance(r, Exception)]
+    return sessions, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the Streamlit option dashboards')
+    parser.add_argument('--app', default='oichart.py')
+    parser.add_argument('--url', help='running app (default: start --app on --port)')
+    parser.add_argument('--pid', type=int, help='server pid of a running app, for CPU/RSS')
+    parser.add_argument('--port', type=int, default=8599)
+    parser.add_argument('--standin-port', type=int, default=8765)
+    parser.add_argument('--metrics-port', type=int, default=9465)
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=120, help='seconds')
+    parser.add_argument('--ramp', type=float, default=10, help='seconds to open all sessions')
+    parser.add_argument('--think', type=float, default=5, help='mean seconds between actions')
+    parser.add_argument('--settle', type=float, default=1.0, help='quiet seconds that end a rerun')
+    parser.add_argument('--refresh', type=int, default=5, help='REFRESH_SECONDS of the started app')
+    parser.add_argument('--strikes', type=int, default=200)
+    parser.add_argument('--expiries', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write the report as JSON')
+    params = parser.parse_args(argv)
+
+    standin, server, process = None, None, None
+    if params.url:
+        base = params.url.rstrip('/')
+        pid = params.pid
+    else:
+        standin = nse_standin.StandIn(n_strikes=params.strikes, n_expiries=params.expiries, seed=params.seed)
+        server = nse_standin.serve(standin, params.standin_port)
+        env = dict(os.environ, NSE_BASE_URL=f'http://127.0.0.1:{params.standin_port}',
+                   METRICS_PORT=str(params.metrics_port), REFRESH_SECONDS=str(params.refresh))
+        process = start_app(params.app, params.port, env)
+        base = f'http://127.0.0.1:{params.port}'
+        pid = process.pid
+
+    sampler = ProcessSampler(pid).start() if pid else None
+    started = time.time()
+    try:
+        sessions, failed = asyncio.run(drive(base.replace('http', 'ws', 1) + '/_stcore/stream', params))
+    finally:
+        server_stats = sampler.stop() if sampler else None
+        rerun_timings = app_rerun_timings(f'http://127.0.0.1:{params.metrics_port}/metrics')
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if server is not None:
+            server.shutdown()
+
+    elapsed = time.time() - started
+    latencies = {action: sum((s.latencies[action] for s in sessions), []) for action in sessions[0].latencies}
+    upstream = standin.request_counts() if standin else None
+    report = {
+        'sessions': params.sessions,
+        'duration_s': round(elapsed, 1),
+        'reruns': sum(len(values) for values in latencies.values()),
+        'errors': sum(s.errors for s in sessions) + len(failed),
+        'rerun_latency': percentiles(sum(latencies.values(), [])),
+        'by_action': {action: percentiles(values) for action, values in latencies.items()},
+        'app_rerun_timings': rerun_timings,
+        'server': server_stats,
+        'upstream_requests': upstream,
+        'upstream_requests_per_min': round(sum(upstream.values()) / elapsed * 60, 1) if upstream else None,
+    }
+    print(json.dumps(report, indent=2))
+    if params.output:
+        with open(params.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
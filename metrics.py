@@ -0,0 +1,167 @@
+# Hot-path instrumentation: duration of every pipeline stage (per rerun and per snapshot)
+# and snapshot freshness, aggregated into percentiles per index/expiry and exported in
+# the Prometheus text format on a small HTTP endpoint and in the admin page
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'option_board'
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+LABELS = ('stage', 'index', 'expiry')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class Metrics:
+    """
+    Keeps the last `window` durations of every (stage, index, expiry) plus running
+    count/sum, the fetch time of the latest snapshot per index/expiry and counters
+    registered by other modules (e.g. upstream NSE requests).
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._fetched_at = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, index='', expiry=''):
+        key = (stage, index, expiry)
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.window)
+                self._totals[key] = [0, 0.0]
+            self._samples[key].append(seconds)
+            self._totals[key][0] += 1
+            self._totals[key][1] += seconds
+
+    @contextmanager
+    def timer(self, stage, index='', expiry=''):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, index, expiry)
+
+    def mark_fresh(self, index, expiry, fetched_at):
+        # Time (epoch seconds) the latest data of index/expiry was produced
+        with self._lock:
+            self._fetched_at[(index, expiry)] = fetched_at
+
+    def register_counter(self, name, help_text, value):
+        # value() is read on every export
+        self._counters[name] = (help_text, value)
+
+    def summary(self):
+        # One row per stage and index/expiry with count, mean and percentiles in ms
+        with self._lock:
+            samples = {key: np.fromiter(values, dtype=float) for key, values in self._samples.items()}
+            totals = {key: tuple(total) for key, total in self._totals.items()}
+        rows = []
+        for key, values in samples.items():
+            count, total = totals[key]
+            quantiles = np.quantile(values, QUANTILES) * 1000
+            rows.append([*key, count, total / count * 1000, *quantiles])
+        columns = ['Stage', 'Index', 'Expiry', 'Count', 'Mean_ms'] + [f'p{int(q * 100)}_ms' for q in QUANTILES]
+        return pd.DataFrame(rows, columns=columns).sort_values(['Stage', 'Index', 'Expiry']).reset_index(drop=True)
+
+    def snapshot_ages(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = [(index, expiry, now - fetched_at) for (index, expiry), fetched_at in self._fetched_at.items()]
+        return pd.DataFrame(rows, columns=['Index', 'Expiry', 'Age_s']).sort_values(['Index', 'Expiry']).reset_index(drop=True)
+
+    def prometheus_text(self):
+        lines = [f'# HELP {PREFIX}_stage_seconds Duration of hot-path stages (last {self.window} samples)',
+                 f'# TYPE {PREFIX}_stage_seconds summary']
+        with self._lock:
+            samples = {key: np.fromiter(values, dtype=float) for key, values in self._samples.items()}
+            totals = {key: tuple(total) for key, total in self._totals.items()}
+        for key in sorted(samples):
+            labels = _labels(**dict(zip(LABELS, key)))
+            for q, value in zip(QUANTILES, np.quantile(samples[key], QUANTILES)):
+                lines.append(f'{PREFIX}_stage_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{{labels}}} {totals[key][1]:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{{labels}}} {totals[key][0]}')
+
+        lines += [f'# HELP {PREFIX}_snapshot_age_seconds Age of the latest data per index/expiry',
+                  f'# TYPE {PREFIX}_snapshot_age_seconds gauge']
+        for row in self.snapshot_ages().itertuples(index=False):
+            lines.append(f'{PREFIX}_snapshot_age_seconds{{{_labels(index=row.Index, expiry=row.Expiry)}}} {row.Age_s:.3f}')
+
+        for name, (help_text, value) in sorted(self._counters.items()):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value()}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+observe = metrics.observe
+timer = metrics.timer
+mark_fresh = metrics.mark_fresh
+register_counter = metrics.register_counter
+
+
+def exchange_timestamp(fetch_time, tz):
+    # Epoch seconds of an NSE 'dd-Mon-YYYY HH:MM:SS' timestamp (exchange time of the chain)
+    try:
+        at = tz.localize(datetime.strptime(str(fetch_time), '%d-%b-%Y %H:%M:%S'))
+    except ValueError:
+        return None
+    return at.timestamp()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port=None, host=None):
+    # Serve /metrics once per server process (METRICS_PORT, default 9464) on METRICS_HOST,
+    # default 127.0.0.1 (0.0.0.0 lets a remote Prometheus scrape it); with several
+    # processes on one host only the first one gets the port
+    global _server
+    with _server_lock:
+        if _server is None:
+            port = int(os.environ.get('METRICS_PORT', 9464)) if port is None else port
+            host = os.environ.get('METRICS_HOST', '127.0.0.1') if host is None else host
+            try:
+                _server = ThreadingHTTPServer((host, port), _Handler)
+            except OSError as e:
+                logger.warning('Metrics endpoint not started on %s:%s: %s', host, port, e)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
+        return _server or None
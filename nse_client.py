@@ -0,0 +1,197 @@
+# NSE client shared by every dashboard: one warm keep-alive session with cookie refresh,
+# a process-wide token-bucket rate limiter, jittered exponential backoff, per-endpoint
+# timeouts and a short response cache. `derivatives` and `capital_market` expose the
+# nselib functions the dashboards use, with the same return shapes.
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# NSE_BASE_URL points the client at another server, e.g. the load-test stand-in
+BASE_URL = os.environ.get('NSE_BASE_URL', 'https://www.nseindia.com').rstrip('/')
+COOKIE_URL = BASE_URL + '/option-chain'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': COOKIE_URL,
+}
+
+# (connect, read) timeouts and response cache TTL in seconds per endpoint
+ENDPOINTS = {
+    'option-chain-indices': {'timeout': (3.05, 10), 'ttl': 15},
+    'allIndices': {'timeout': (3.05, 5), 'ttl': 15},
+}
+COOKIE_MAX_AGE = 300
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+class TokenBucket:
+    # `rate` requests per second on average with bursts of up to `capacity`. The bucket
+    # lives in one process, so N server processes send up to N x `rate` to NSE; run them
+    # with SHARED_SNAPSHOTS=1 so the polled chains (snapshots.option_chain) are fetched by
+    # a single publisher process and only the remaining calls are multiplied.
+    def __init__(self, rate=3.0, capacity=5):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class NSEClient:
+    def __init__(self, rate=3.0, burst=5):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        for scheme in ('https://', 'http://'):
+            self.session.mount(scheme, HTTPAdapter(pool_connections=2, pool_maxsize=16))
+        self.bucket = TokenBucket(rate, burst)
+        self.cookies_at = 0.0
+        self.requests_sent = 0
+        self._sent_lock = threading.Lock()
+        self._cookie_lock = threading.Lock()
+        self._cache = {}
+        self._url_locks = {}
+        self._url_locks_guard = threading.Lock()
+
+    def _refresh_cookies(self, force=False):
+        with self._cookie_lock:
+            if not force and time.time() - self.cookies_at < COOKIE_MAX_AGE:
+                return
+            self.bucket.acquire()
+            self._count_request()
+            self.session.get(COOKIE_URL, timeout=(3.05, 10))
+            self.cookies_at = time.time()
+
+    def _count_request(self):
+        with self._sent_lock:
+            self.requests_sent += 1
+
+    def _url_lock(self, url):
+        with self._url_locks_guard:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def get_json(self, endpoint, **params):
+        """
+        GET /api/<endpoint> as JSON. Identical requests within the endpoint TTL share one
+        response (concurrent callers wait for the first one instead of sending their own).
+        """
+        config = ENDPOINTS.get(endpoint, {'timeout': (3.05, 10), 'ttl': 0})
+        url = f'{BASE_URL}/api/{endpoint}'
+        key = (url, tuple(sorted(params.items())))
+        with self._url_lock(key):
+            cached = self._cache.get(key)
+            if cached is not None and time.time() - cached[0] < config['ttl']:
+                return cached[1]
+            with metrics.timer(f'nse:{endpoint}', params.get('symbol', '')):
+                data = self._fetch(url, params, config['timeout'])
+            self._cache[key] = (time.time(), data)
+            return data
+
+    def _fetch(self, url, params, timeout):
+        for attempt in range(MAX_RETRIES):
+            try:
+                self._refresh_cookies()
+                self.bucket.acquire()
+                self._count_request()
+                response = self.session.get(url, params=params, timeout=timeout)
+                if response.status_code in (401, 403):
+                    self._refresh_cookies(force=True)
+                    raise requests.HTTPError(f'{response.status_code} from NSE', response=response)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.HTTPError(f'{response.status_code} from NSE', response=response)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning('NSE request %s failed (%s), retrying in %.1fs', url, e, delay)
+                time.sleep(delay)
+
+
+client = NSEClient()
+metrics.register_counter('option_board_nse_requests_total', 'HTTP requests sent to NSE',
+                         lambda: client.requests_sent)
+
+# nselib option-chain field names for each NSE API field
+OPTION_FIELDS = {
+    'openInterest': 'OI',
+    'changeinOpenInterest': 'Chng_in_OI',
+    'totalTradedVolume': 'Volume',
+    'impliedVolatility': 'IV',
+    'lastPrice': 'LTP',
+    'change': 'Net_Chng',
+    'bidQty': 'Bid_Qty',
+    'bidprice': 'Bid_Price',
+    'askPrice': 'Ask_Price',
+    'askQty': 'Ask_Qty',
+}
+
+
+class _ExpiryDates(dict):
+    # Expiries are fetched per index on first access instead of for every index up front
+    def __missing__(self, symbol):
+        return client.get_json('option-chain-indices', symbol=symbol)['records']['expiryDates']
+
+
+def expiry_dates_option_index():
+    # {index: [expiry dates as dd-Mon-YYYY]}, like nselib
+    return _ExpiryDates()
+
+
+def nse_live_option_chain(symbol, expiry_date=None, oi_mode='full'):
+    # Live option chain with nselib's CALLS_*/PUTS_* columns; expiry_date is dd-mm-YYYY
+    records = client.get_json('option-chain-indices', symbol=symbol)['records']
+    rows = pd.DataFrame(records['data'])
+    if expiry_date is not None:
+        expiry = datetime.strptime(expiry_date, '%d-%m-%Y').strftime('%d-%b-%Y')
+        rows = rows[rows['expiryDate'] == expiry]
+    chain = pd.DataFrame({
+        'Fetch_Time': records.get('timestamp'),
+        'Symbol': symbol,
+        'Expiry_Date': rows['expiryDate'].to_numpy(),
+        'Strike_Price': rows['strikePrice'].to_numpy(),
+    })
+    for side, prefix in (('CE', 'CALLS'), ('PE', 'PUTS')):
+        legs = pd.json_normalize(rows.get(side, pd.Series(index=rows.index, dtype=object)).apply(
+            lambda leg: leg if isinstance(leg, dict) else {}).tolist())
+        for field, name in OPTION_FIELDS.items():
+            chain[f'{prefix}_{name}'] = legs[field].to_numpy() if field in legs.columns else 0
+    return chain.fillna(0).reset_index(drop=True)
+
+
+def market_watch_all_indices():
+    return pd.DataFrame(client.get_json('allIndices')['data'])
+
+
+derivatives = SimpleNamespace(
+    expiry_dates_option_index=expiry_dates_option_index,
+    nse_live_option_chain=nse_live_option_chain,
+)
+capital_market = SimpleNamespace(market_watch_all_indices=market_watch_all_indices)
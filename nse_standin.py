@@ -0,0 +1,149 @@
+# Local stand-in for the NSE endpoints used by nse_client, serving synthetic chains that
+# evolve over time. Point the app at it with NSE_BASE_URL=http://127.0.0.1:<port>.
+# Counts every request per path, so load tests can report upstream traffic.
+#
+#   python nse_standin.py --port 8765
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import nse_client
+import option_data
+import synthetic_chain
+
+
+def to_payload(option, symbol, spot):
+    # /api/option-chain-indices response for a synthetic chain with nselib columns
+    data = []
+    for row in option.to_dict('records'):
+        entry = {'strikePrice': row['Strike_Price'], 'expiryDate': row['Expiry_Date']}
+        for side, prefix in (('CE', 'CALLS'), ('PE', 'PUTS')):
+            leg = {field: row[f'{prefix}_{name}'] for field, name in nse_client.OPTION_FIELDS.items()}
+            leg.update(strikePrice=row['Strike_Price'], expiryDate=row['Expiry_Date'], underlying=symbol)
+            entry[side] = leg
+        data.append(entry)
+    return {'records': {
+        'expiryDates': list(dict.fromkeys(option['Expiry_Date'])),
+        'data': data,
+        'timestamp': option['Fetch_Time'].iloc[0],
+        'underlyingValue': spot,
+    }}
+
+
+def _dumps(payload):
+    return json.dumps(payload, default=lambda value: value.item()).encode()
+
+
+class StandIn:
+    """
+    Synthetic market: one chain per index (n_strikes x n_expiries) that moves to its
+    next snapshot every `interval` seconds. Encoded responses are kept until then.
+    """
+
+    def __init__(self, indices=option_data.INDICES, n_strikes=200, n_expiries=4, interval=30, seed=None):
+        self.interval = interval
+        self.rng = np.random.default_rng(seed)
+        self.chains = {index: synthetic_chain.option_chain(index, n_strikes, n_expiries, seed=self.rng.integers(1 << 31))
+                       for index in indices}
+        self.spots = {index: synthetic_chain.SPOTS[index] for index in indices}
+        self.requests = Counter()
+        self._bodies = {}
+        self._evolved_at = time.time()
+        self._lock = threading.Lock()
+
+    def _advance(self):
+        # Move every chain and spot forward once per interval
+        if time.time() - self._evolved_at < self.interval:
+            return
+        for index, chain in self.chains.items():
+            self.chains[index] = synthetic_chain.evolve(chain, self.rng)
+            self.spots[index] = round(self.spots[index] * float(np.exp(self.rng.normal(0, 0.001))), 2)
+        self._bodies.clear()
+        self._evolved_at = time.time()
+
+    def body(self, path, params):
+        with self._lock:
+            self.requests[path] += 1
+            self._advance()
+            if path == '/api/option-chain-indices':
+                symbol = params.get('symbol', [''])[0]
+                if symbol not in self.chains:
+                    return None
+                key = (path, symbol)
+                if key not in self._bodies:
+                    self._bodies[key] = _dumps(to_payload(self.chains[symbol], symbol, self.spots[symbol]))
+                return self._bodies[key]
+            if path == '/api/allIndices':
+                if path not in self._bodies:
+                    self._bodies[path] = _dumps({'data': [{'index': option_data.SPOT_NAMES[index], 'last': spot}
+                                                          for index, spot in self.spots.items()]})
+                return self._bodies[path]
+            if path == '/option-chain':
+                return b'<html></html>'
+            return None
+
+    def request_counts(self):
+        with self._lock:
+            return dict(self.requests)
+
+
+def make_handler(standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            body = standin.body(url.path, parse_qs(url.query))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            if url.path == '/option-chain':
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Set-Cookie', 'nsit=standin; Path=/')
+            else:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(standin, port=8765, host='127.0.0.1'):
+    # Start serving in a daemon thread; returns the server (server.shutdown() to stop)
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='nse-standin', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve synthetic NSE option chains locally')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--strikes', type=int, default=200)
+    parser.add_argument('--expiries', type=int, default=4)
+    parser.add_argument('--interval', type=float, default=30, help='seconds between snapshots')
+    params = parser.parse_args(argv)
+    standin = StandIn(n_strikes=params.strikes, n_expiries=params.expiries, interval=params.interval)
+    server = serve(standin, params.port)
+    print(f'NSE stand-in on http://127.0.0.1:{params.port} (NSE_BASE_URL)')
+    try:
+        while True:
+            time.sleep(60)
+            print(standin.request_counts())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Local OHLCV store keyed by symbol and interval: bars are kept on disk and only the
+# missing bars are downloaded, for many symbols in one batched yfinance call
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get('OHLCV_CACHE_DIR', '.ohlcv_cache')
+
+# How long a cached series is considered current before the last bars are refreshed
+MAX_AGE = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '1d': 3600, '1wk': 6 * 3600, '1mo': 24 * 3600}
+
+
+def _cache_path(symbol, interval):
+    return os.path.join(CACHE_DIR, f"{re.sub(r'[^A-Za-z0-9.-]', '_', symbol)}_{interval}.pkl")
+
+
+def _read(symbol, interval):
+    path = _cache_path(symbol, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def _write(symbol, interval, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # one temp file per writer, so processes (and sessions) refreshing the same symbol
+    # never write into each other's file before the rename
+    tmp = f'{_cache_path(symbol, interval)}.{os.getpid()}.{threading.get_ident()}.tmp'
+    pd.to_pickle(entry, tmp)
+    os.replace(tmp, _cache_path(symbol, interval))
+
+
+def _naive(ts):
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def _download(symbols, start, end, interval):
+    # One yf.download for all symbols -> {symbol: bars}; yfinance is only imported on a cache miss
+    import yfinance as yf
+    data = yf.download(symbols, start=start, end=end, interval=interval, group_by='ticker',
+                       auto_adjust=False, progress=False, threads=True)
+    bars = {}
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol in data.columns.get_level_values(0):
+                frame = data[symbol]
+            elif symbol in data.columns.get_level_values(-1):
+                frame = data.xs(symbol, axis=1, level=-1)
+            else:
+                continue
+        else:
+            frame = data
+        bars[symbol] = frame.dropna(how='all')
+    return bars
+
+
+def load_ohlcv(symbols, start_date, end_date, interval='1d'):
+    """
+    Bars of every symbol between start_date and end_date, served from the disk cache.
+    Symbols not cached (or cached from a later start) are downloaded together, and
+    stale ones get one shared delta download starting at their oldest last bar.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    now = time.time()
+    max_age = MAX_AGE.get(interval, 900)
+    entries, full, stale = {}, [], []
+    for symbol in dict.fromkeys(symbols):
+        entry = _read(symbol, interval)
+        if entry is None or entry['bars'].empty or start < entry['start']:
+            full.append(symbol)
+        else:
+            entries[symbol] = entry
+            if now - entry['fetched_at'] > max_age:
+                stale.append(symbol)
+
+    if full:
+        for symbol, bars in _download(full, start, None, interval).items():
+            entries[symbol] = {'bars': bars, 'start': start, 'fetched_at': now}
+            _write(symbol, interval, entries[symbol])
+    if stale:
+        # refetch from the oldest last bar so the (possibly incomplete) last bar is refreshed
+        delta_start = min(_naive(entries[symbol]['bars'].index[-1]) for symbol in stale).normalize()
+        for symbol, bars in _download(stale, delta_start, None, interval).items():
+            merged = pd.concat([entries[symbol]['bars'], bars])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            entries[symbol] = {'bars': merged, 'start': entries[symbol]['start'], 'fetched_at': now}
+            _write(symbol, interval, entries[symbol])
+
+    result = {}
+    for symbol in dict.fromkeys(symbols):
+        bars = entries[symbol]['bars'] if symbol in entries else pd.DataFrame()
+        if not bars.empty:
+            # end is exclusive, like yf.download
+            index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+            bars = bars[(index >= start) & (index < end)]
+        result[symbol] = bars.copy()
+    return result
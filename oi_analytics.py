@@ -0,0 +1,77 @@
+# Analytics of one option chain (indexed by strike, CE_/PE_ columns as in option_data):
+# OI signals, top change in OI, PCR, ratio spreads and OI change alerts. Shared by the
+# dashboards, the benchmarks and the headless scanner, so no streamlit / matplotlib here.
+import numpy as np
+import pandas as pd
+
+import option_data
+
+TOP_OI_CHANGE = 18
+RATIO_SPREAD_LEGS = 6
+ALERT_RATIO = 3
+
+
+def generate_signal(row):
+    if row['PE_CHG_OI'] > row['CE_CHG_OI'] * 2:
+        return "BUY CE"
+    elif row['CE_CHG_OI'] > row['PE_CHG_OI'] * 2:
+        return "BUY PE"
+    else:
+        return "HOLD"
+
+
+def enhanced_signal(row):
+    """
+    Enhanced Signal Generation based on OI change, Volume, IV, and Greeks.
+    """
+    if row['PE_CHG_OI'] > row['CE_CHG_OI'] * 2 and row['Volume'] > 1000 and row['Implied_Volatility'] > 20:
+        return "STRONG BUY CE"
+    elif row['CE_CHG_OI'] > row['PE_CHG_OI'] * 2 and row['Volume'] > 1000 and row['Implied_Volatility'] > 20:
+        return "STRONG BUY PE"
+    else:
+        return "HOLD"
+
+
+def signals(oi):
+    # generate_signal for every strike, on whole columns
+    ce, pe = oi['CE_CHG_OI'], oi['PE_CHG_OI']
+    return pd.Series(np.select([pe > ce * 2, ce > pe * 2], ['BUY CE', 'BUY PE'], 'HOLD'), index=oi.index)
+
+
+def enhanced_signals(oi):
+    # enhanced_signal for every strike; needs Volume and Implied_Volatility columns
+    ce, pe = oi['CE_CHG_OI'], oi['PE_CHG_OI']
+    active = (oi['Volume'] > 1000) & (oi['Implied_Volatility'] > 20)
+    return pd.Series(np.select([(pe > ce * 2) & active, (ce > pe * 2) & active],
+                               ['STRONG BUY CE', 'STRONG BUY PE'], 'HOLD'), index=oi.index)
+
+
+def top_oi_change(oi, n=TOP_OI_CHANGE):
+    # Strikes with the largest absolute change in OI, largest first
+    return oi[['CE_CHG_OI', 'PE_CHG_OI']].abs().sum(axis=1).sort_values(ascending=False).index[:n]
+
+
+def pcr(o):
+    # Put-call ratio of the open interest of the whole chain
+    return np.round(o.PE_OI.sum() / o.CE_OI.sum(), 2)
+
+
+def ratio_spreads(o, index, cmp, legs=RATIO_SPREAD_LEGS):
+    """
+    Ratio spread table of option.py: LTP minus twice the LTP 1..legs strikes further
+    out of the money, for the 12 strikes on each side of the spot.
+    """
+    step = option_data.STRIKE_WINDOWS[index][0]
+    call, put = pd.DataFrame(index=o.index), pd.DataFrame(index=o.index)
+    for n in range(1, legs + 1):
+        call[f'CALLS {n * step} sprade'] = o['CE_LTP'] - o['CE_LTP'].shift(-n) * 2
+        put[f'PUTS {n * step} sprade'] = o['PE_LTP'] - o['PE_LTP'].shift(n) * 2
+    call = call[call.index > cmp].dropna().iloc[:12]
+    put = put[put.index < cmp].dropna().iloc[-12:]
+    return pd.concat([put, call])
+
+
+def oi_change_alerts(oi, ratio=ALERT_RATIO):
+    # Strikes where the PE change in OI is more than `ratio` times the CE change
+    alerts = oi.assign(PE_to_CE_OI_Change_Ratio=oi['PE_CHG_OI'] / oi['CE_CHG_OI'])
+    return alerts[alerts['PE_to_CE_OI_Change_Ratio'] > ratio]
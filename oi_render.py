@@ -0,0 +1,43 @@
+# Tables and charts of the option dashboard (oichart.py) built from a strike window:
+# Styler tables and the OI / OI change chart as PNG. The benchmarks time these same
+# builders; matplotlib is only imported when a chart is drawn.
+import io
+
+OI_COLUMNS = ['CE_OI', 'PE_OI', 'CE_CHG_OI', 'PE_CHG_OI']
+CHANGE_COLUMNS = ['CE_CHG_OI', 'PE_CHG_OI']
+
+
+def color_positive_negative(val):
+    color = 'green' if val > 0 else 'red' if val < 0 else 'black'
+    return f'color: {color}'
+
+
+def chain_table(oi):
+    # Option Chain view: the largest OI and change in OI highlighted
+    return oi.style.highlight_max(axis=0, subset=OI_COLUMNS)
+
+
+def oi_analysis_table(oi):
+    # OI Analysis view: OI changes colored by sign
+    return oi.style.applymap(color_positive_negative, subset=CHANGE_COLUMNS)
+
+
+def oi_chart_png(oi, cmp):
+    # OI and OI change per strike in separate subplots, as PNG
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots(2, 2)
+
+    ax[0, 0].bar(oi.index, oi['CE_OI'], color='blue', width=10)
+    ax[0, 0].axvline(x=cmp, color='black', linestyle='--', label='Spot Price')
+    ax[0, 0].set_title('Call OI')
+    ax[0, 1].bar(oi.index, oi['PE_OI'], color='red', width=10)
+    ax[0, 1].axvline(x=cmp, color='black', linestyle='--', label='Spot Price')
+    ax[0, 1].set_title('Put OI')
+
+    ax[1, 0].bar(oi.index, oi['CE_CHG_OI'], color=['green' if v > 0 else 'red' for v in oi['CE_CHG_OI']], width=10)
+    ax[1, 1].bar(oi.index, oi['PE_CHG_OI'], color=['green' if v > 0 else 'red' for v in oi['PE_CHG_OI']], width=10)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -1,14 +1,24 @@
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
+from nse_client import derivatives, capital_market
 from datetime import datetime
 import numpy as np
 import pandas as pd
 import streamlit as st
+import os
 import time
 import pytz  # New import for handling Indian time zone
+import alert_engine
+import chain_history
+import snapshot_archive
+import metrics
+import session_store
+import snapshots
+import oi_analytics
+import oi_render
+import analytics_api
 # from nselib import greeks
 
+rerun_started = time.perf_counter()
+
 # Add title of the web-app
 st.title(':red[NSE] **Option Dashboard**')
 st.header('Option Analysis', divider='rainbow')
@@ -16,21 +26,59 @@ st.header('Option Analysis', divider='rainbow')
 # Initialize Indian timezone
 indian_tz = pytz.timezone('Asia/Kolkata')  # Set Indian Time Zone
 
-# Create some tabs for option analysis
-#tab1, tab2, tab4, tab5, tab6 = st.tabs([
-#    "Option Chain", "OI Analysis", "OI-based Buy/Sell Signal", "Signal History", "Enhanced OI-based Buy/Sell Signal"
-#])
-tab1, tab2, tab4, tab5, tab6, tab7 = st.tabs([
-    "Option Chain", "OI Analysis", "OI-based Buy/Sell Signal", "Signal History", "Enhanced OI-based Buy/Sell Signal", "OI Change Alert"
-])
+
+
+# Analytics of one snapshot are computed once and shared by every session and rerun.
+# `snapshot` (index, expiry, exchange timestamp, strike window) is the cache key; the
+# underscore-prefixed frames are not hashed by Streamlit.
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_signals(_oi, snapshot):
+    return oi_analytics.signals(_oi)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_enhanced_signals(_oi, snapshot):
+    return oi_analytics.enhanced_signals(_oi)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def top_oi_change(_oi, snapshot, n=oi_analytics.TOP_OI_CHANGE):
+    return oi_analytics.top_oi_change(_oi, n)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def oi_chart_png(_oi_atm_filtered, snapshot, cmp):
+    # OI and OI change for 5 strikes above and below ATM in separate subplots, as PNG
+    return oi_render.oi_chart_png(_oi_atm_filtered, cmp)
+
+
+# Only the selected view is computed and rendered on a rerun (st.tabs runs every tab body)
+VIEWS = ["Option Chain", "OI Analysis", "OI-based Buy/Sell Signal", "Signal History",
+         "Enhanced OI-based Buy/Sell Signal", "OI Change Alert", "OI Build-up", "PCR Trend"]
+view = st.radio('View', VIEWS, horizontal=True, label_visibility='collapsed')
+# Background services shared by every session: alerts, intraday history and the snapshot archive
+alert_engine.get_engine()
+chain_history.get_history_store()
+snapshot_archive.start_archiving()
+metrics.start_http_server()
+if os.environ.get('API_PORT'):
+    analytics_api.start()
+
 # Create side bar to select index instrument and for expiry day selection
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
-ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
+with metrics.timer('expiries', index):
+    expiries = derivatives.expiry_dates_option_index()[index]
+ex = st.sidebar.selectbox('Select expiry date', expiries)
 
 # Extracting data from nselib library
 try:
-    option = derivatives.nse_live_option_chain(index, exp)
+    with metrics.timer('fetch_chain', index, ex):
+        option = snapshots.option_chain(index, ex)
+    # data freshness: age of the exchange timestamp of this chain
+    fetched_at = metrics.exchange_timestamp(option['Fetch_Time'].iloc[0], indian_tz) if len(option) else None
+    if fetched_at is not None:
+        metrics.mark_fresh(index, ex, fetched_at)
+        metrics.observe('snapshot_age', time.time() - fetched_at, index, ex)
 
     # Rename columns and add time column (hh:mm format)
     o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
@@ -48,6 +96,7 @@ try:
     o['Time'] = current_time
 
     # Calculating spot price and setting up range for option analysis
+    spot_started = time.perf_counter()
     if index == 'NIFTY':
         cmp = capital_market.market_watch_all_indices().set_index('index').loc['NIFTY 50', 'last']
         range = (int(np.round(cmp / 50.0)) * 50) + 1000, (int(np.round(cmp / 50.0)) * 50) - 1000
@@ -60,14 +109,39 @@ try:
         cmp = capital_market.market_watch_all_indices().set_index('index').loc['NIFTY FINANCIAL SERVICES', 'last']
         range = (int(np.round(cmp / 50.0)) * 50) + 900, (int(np.round(cmp / 50.0)) * 50) - 900
         oi = o.loc[range[1]:range[0]]
+    metrics.observe('spot', time.perf_counter() - spot_started, index, ex)
+    snapshot = (index, ex, str(option['Fetch_Time'].iloc[0]) if 'Fetch_Time' in option.columns else current_time, range)
+
+    # Signals feed the signal views and the session's signal history on every rerun
+    with metrics.timer('signal_apply', index, ex):
+        oi['Signal'] = compute_signals(oi, snapshot)
+
+    # Initialize signal history if it doesn't exist
+    if 'signal_history' not in st.session_state:
+        st.session_state.signal_history = pd.DataFrame(columns=[
+            'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time',
+            'Date', 'Index', 'Expiry'
+        ])
+
+    # Generate current signals
+    current_signals = oi[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time']].copy()
+    current_signals['Strike_Price'] = current_signals.index
+    # Date, index and expiry keep the rows of different days and contracts apart in backtests
+    current_signals['Date'] = datetime.now(indian_tz).strftime('%Y-%m-%d')
+    current_signals['Index'] = index
+    current_signals['Expiry'] = ex
+
+    # Append new signals to the history
+    session_store.append_rows('signal_history', current_signals)
 
     # Tab 1: Option Chain
-    with tab1:
+    if view == "Option Chain":
         st.subheader('Option Chain')
-        st.table(oi.style.highlight_max(axis=0, subset=['CE_OI', 'PE_OI', 'CE_CHG_OI', 'PE_CHG_OI']))
+        with metrics.timer('render:chain_table', index, ex):
+            st.table(oi_render.chain_table(oi))
 
     # Tab 2: OI Analysis with additional columns for Time, CE_LTP, and PE_LTP
-    with tab2:
+    if view == "OI Analysis":
         st.subheader('Open Interest Analysis')
 
         # Identify ATM (At-The-Money) strike
@@ -83,80 +157,37 @@ try:
         oi_atm_filtered['Time'] = current_time
 
         # Plot OI and OI change for 5 strikes above and below ATM in separate subplots
-        fig, ax = plt.subplots(2, 2, figsize=(12, 8))
-
-        ax[0, 0].bar(oi_atm_filtered.index, oi_atm_filtered['CE_OI'], color='blue', width=10)
-        ax[0, 0].axvline(x=cmp, color='black', linestyle='--', label='Spot Price')
-        ax[0, 0].set_title('Call OI')
-        ax[0, 1].bar(oi_atm_filtered.index, oi_atm_filtered['PE_OI'], color='red', width=10)
-        ax[0, 1].axvline(x=cmp, color='black', linestyle='--', label='Spot Price')
-        ax[0, 1].set_title('Put OI')
-
-        ax[1, 0].bar(oi_atm_filtered.index, oi_atm_filtered['CE_CHG_OI'], 
-                     color=['green' if v > 0 else 'red' for v in oi_atm_filtered['CE_CHG_OI']], width=10)
-        ax[1, 1].bar(oi_atm_filtered.index, oi_atm_filtered['PE_CHG_OI'], 
-                     color=['green' if v > 0 else 'red' for v in oi_atm_filtered['PE_CHG_OI']], width=10)
-
-        # Show plots
-        st.pyplot(fig)
+        with metrics.timer('render:oi_chart', index, ex):
+            st.image(oi_chart_png(oi_atm_filtered, snapshot, cmp))
 
         # Display the filtered table with OI, OI Change, CE_LTP, PE_LTP, and Time
         oi_atm_filtered_table = oi_atm_filtered[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Time']].copy()
 
-        # Apply color formatting for OI changes
-        def color_positive_negative(val):
-            color = 'green' if val > 0 else 'red' if val < 0 else 'black'
-            return f'color: {color}'
-
-        # Display the table with conditional formatting
-        st.table(oi_atm_filtered_table.style.applymap(color_positive_negative, subset=['CE_CHG_OI', 'PE_CHG_OI']))
+        # Display the table with color formatting for OI changes
+        with metrics.timer('render:oi_table', index, ex):
+            st.table(oi_render.oi_analysis_table(oi_atm_filtered_table))
 
     # Tab 4: OI-based Buy/Sell Signal (unchanged)
-    with tab4:
+    if view == "OI-based Buy/Sell Signal":
         st.subheader('OI-based Buy/Sell Signal')
 
-        def generate_signal(row):
-            if row['PE_CHG_OI'] > row['CE_CHG_OI'] * 2:
-                return "BUY CE"
-            elif row['CE_CHG_OI'] > row['PE_CHG_OI'] * 2:
-                return "BUY PE"
-            else:
-                return "HOLD"
-
-        # Apply the signal generation function
-        oi['Signal'] = oi.apply(generate_signal, axis=1)
-
-        # Sort by the absolute value of change in OI (largest change first)
-        oi_sorted = oi.reindex(oi[['CE_CHG_OI', 'PE_CHG_OI']].abs().sum(axis=1).sort_values(ascending=False).index)
-
-        # Select only the top 5 strikes with the most significant change in OI
-        oi_top_5 = oi_sorted.head(18)
+        # Select only the top 18 strikes with the most significant change in OI (largest change first)
+        oi_top_5 = oi.loc[top_oi_change(oi, snapshot)]
 
         # Create signal_table and include CE_LTP and PE_LTP columns
         signal_table = oi_top_5[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal']].style.applymap(
             lambda val: 'color: green' if val == 'BUY CE' else 'color: red' if val == 'BUY PE' else 'color: black',
             subset=['Signal']
         )
-        st.table(signal_table)
+        with metrics.timer('render:signal_table', index, ex):
+            st.table(signal_table)
 
     # Tab 5: Signal History with Time, CE_LTP, PE_LTP, and Color Coding
-    with tab5:
+    if view == "Signal History":
         st.subheader('Signal History')
 
-        # Initialize signal history if it doesn't exist
-        if 'signal_history' not in st.session_state:
-            st.session_state.signal_history = pd.DataFrame(columns=[
-                'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time'
-            ])
-
-        # Generate current signals
-        current_signals = oi[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time']].copy()
-        current_signals['Strike_Price'] = current_signals.index
-
-        # Append new signals to the history
-        st.session_state.signal_history = pd.concat([st.session_state.signal_history, current_signals], ignore_index=True)
-
         # Display the updated signal history DataFrame with color coding
+        history_started = time.perf_counter()
         st.dataframe(
             st.session_state.signal_history.style.applymap(
                 lambda val: 'color: green' if 'BUY CE' in val else 'color: red' if 'BUY PE' in val else 'color: black',
@@ -164,6 +195,7 @@ try:
             ),
             use_container_width=True  # This adjusts the table width based on the container width
         )
+        metrics.observe('render:signal_history', time.perf_counter() - history_started, index, ex)
 
         # Add download button for the CSV file
         csv = st.session_state.signal_history.to_csv(index=False)
@@ -175,15 +207,8 @@ try:
         )
 
 
-    # Adding additional metrics: Spot price and PCR (Put-Call Ratio)
-    st.write(index)
-    col1, col2 = st.columns(2)
-    col1.metric('**Spot price**', cmp)
-    pcr = np.round(o.PE_OI.sum() / o.CE_OI.sum(), 2)
-    col2.metric('**PCR:**', pcr)
-
     # Tab 6: Enhanced OI-based Buy/Sell Signal (moved from Tab 4)
-    with tab6:
+    if view == "Enhanced OI-based Buy/Sell Signal":
         st.subheader('Enhanced OI-based Buy/Sell Signal')
 
         # Additional parameters like volume, IV, greeks, etc.
@@ -208,21 +233,9 @@ try:
         # oi['Theta'] = greeks_data['Theta']
         # oi['Vega'] = greeks_data['Vega']
 
-        def enhanced_signal(row):
-            """
-            Enhanced Signal Generation based on OI change, Volume, IV, and Greeks.
-            """
-            if row['PE_CHG_OI'] > row['CE_CHG_OI'] * 2 and row['Volume'] > 1000 and row['Implied_Volatility'] > 20:
-                return "STRONG BUY CE"
-            elif row['CE_CHG_OI'] > row['PE_CHG_OI'] * 2 and row['Volume'] > 1000 and row['Implied_Volatility'] > 20:
-                return "STRONG BUY PE"
-            # elif row['Gamma'] > 0.5 and row['Theta'] < 0 and row['Volume'] > 1000:
-            #     return "BUY Gamma"
-            else:
-                return "HOLD"
-
         # Apply enhanced signal generation
-        oi['Enhanced_Signal'] = oi.apply(enhanced_signal, axis=1)
+        with metrics.timer('enhanced_signal_apply', index, ex):
+            oi['Enhanced_Signal'] = compute_enhanced_signals(oi, snapshot)
 
         # Sort and show the top 10 most active strikes
         oi_sorted = oi.sort_values(by=['Volume', 'Implied_Volatility'], ascending=False).head(10)
@@ -231,17 +244,11 @@ try:
         st.table(oi_sorted[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Volume', 'Implied_Volatility', 'Enhanced_Signal']].style.applymap(
             lambda val: 'color: green' if 'BUY' in val else 'color: black', subset=['Enhanced_Signal']
         ))
-    with tab7:
+    if view == "OI Change Alert":
         st.subheader('OI Change Alert')
         
-        # Calculate the ratio of PE_OI change to CE_OI change
-        oi['PE_to_CE_OI_Change_Ratio'] = oi['PE_CHG_OI'] / oi['CE_CHG_OI']
-        
-        # Generate alerts where the ratio of PE_OI change to CE_OI change is more than 3
-        alert_condition = oi['PE_to_CE_OI_Change_Ratio'] > 3
-        
-        # Filter the strikes where the condition is met
-        alerts = oi[alert_condition].copy()
+        # Strikes where the ratio of PE_OI change to CE_OI change is more than 3
+        alerts = oi_analytics.oi_change_alerts(oi)
         
         # If there are any alerts, display them
         if not alerts.empty:
@@ -257,9 +264,63 @@ try:
         
         else:
             st.write("No alerts found where PE OI change is more than 3 times the CE OI change.")
-        
+
+        # Alerts raised by the background engine, even while nobody had this tab open
+        st.write("**Alert Inbox**")
+        st.dataframe(alert_engine.get_engine().inbox.messages(index, ex), use_container_width=True)
+        caption, warning = alert_engine.coverage(index, ex)
+        st.caption(caption)
+        if warning:
+            st.warning(warning)
+
+    # Tab 8: Intraday OI build-up per strike from consecutive snapshots
+    if view == "OI Build-up":
+        st.subheader('Intraday OI Build-up')
+        interval = st.selectbox('Interval', ['15min', '5min', '30min', 'Every snapshot'])
+        every = None if interval == 'Every snapshot' else interval
+
+        def color_buildup(val):
+            colors = {'Long Build-up': 'green', 'Short Build-up': 'red', 'Short Covering': 'blue', 'Long Unwinding': 'orange'}
+            return f'color: {colors[val]}' if val in colors else ''
+
+        history_store = chain_history.get_history_store()
+        for side in ('CE', 'PE'):
+            buildup = history_store.buildup_table(index, ex, side=side, every=every, strikes=oi.index)
+            st.write(f"**{side} build-up**")
+            if buildup.shape[1] == 0:
+                st.write("Not enough snapshots recorded yet for this expiry.")
+            else:
+                st.dataframe(buildup.style.applymap(color_buildup), use_container_width=True)
+
+    # Tab 9: Intraday PCR of several strike windows, recorded from the polled snapshots
+    if view == "PCR Trend":
+        st.subheader('Intraday PCR')
+        rolling = st.selectbox('Rolling window (snapshots)', [10, 5, 20, 40])
+        pcr_series = chain_history.get_history_store().pcr_series(index, ex, rolling=rolling)
+        covered = snapshots.get_poller().covered_pairs()
+        if pcr_series.empty and covered and (index, ex) not in covered:
+            st.write(f"PCR is recorded only for the expiries polled in the background (POLL_EXPIRIES nearest "
+                     f"per index); {index} {ex} is not tracked.")
+        elif pcr_series.empty:
+            st.write("No snapshots recorded yet for this expiry.")
+        else:
+            windows = [column for column in pcr_series.columns
+                       if column != 'Spot' and not column.endswith(('_Mean', '_Upper', '_Lower'))]
+            window = st.selectbox('PCR window', windows)
+            st.line_chart(pcr_series[[window, f'{window}_Mean', f'{window}_Upper', f'{window}_Lower']])
+            st.dataframe(pcr_series[['Spot', *windows]].iloc[::-1].round(2), use_container_width=True)
+
+
+    # Adding additional metrics: Spot price and PCR (Put-Call Ratio)
+    st.write(index)
+    col1, col2 = st.columns(2)
+    col1.metric('**Spot price**', cmp)
+    pcr = oi_analytics.pcr(o)
+    col2.metric('**PCR:**', pcr)
+
 except Exception as e:
     st.error(f"An error occurred: {e}")
-# Refresh every 3 minutes
-time.sleep(180)  # Wait for 180 seconds
+metrics.observe('rerun', time.perf_counter() - rerun_started, index, ex)
+# Refresh every 3 minutes (REFRESH_SECONDS overrides it, e.g. for load tests)
+time.sleep(int(os.environ.get('REFRESH_SECONDS', 180)))  # Wait for 180 seconds
 st.experimental_rerun()  # Re-run the script to refresh the data
@@ -1,11 +1,9 @@
 # import all important libraries
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
-from datetime import datetime
+from nse_client import derivatives, capital_market
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
 
 # add title of the web-app
 st.title(':red[NSE] **Option Dashboard**')
@@ -17,11 +15,10 @@ tab1, tab2,tab3 = st.tabs(["option chain","OI",'Ratio strategy'])
 # create side bar to select index instrument and for expiry day selection
 index= st.sidebar.selectbox("select index name",('NIFTY',"BANKNIFTY","FINNIFTY"))
 ex= st.sidebar.selectbox('select expiry date',derivatives.expiry_dates_option_index()[index])
-exp=datetime.strptime(ex,'%d-%b-%Y').strftime('%d-%m-%Y')
 
 #extracting data from nselib library 
 try:
-  option=derivatives.nse_live_option_chain(index,exp)
+  option=snapshots.option_chain(index,ex)
   o=option[['CALLS_OI', 'CALLS_Chng_in_OI','CALLS_LTP','Strike_Price','PUTS_LTP','PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
 
   if index =='NIFTY':
@@ -42,6 +39,7 @@ try:
   with tab2:
     
     st.subheader('Open interest analysis')
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(2, 1)
     ax[0].bar(oi.index, oi['CALLS_OI'], color='blue', width=20)
     ax[0].bar(oi.index - 10, oi['PUTS_OI'], color='red', width=20)
@@ -0,0 +1,69 @@
+# Shared option-chain helpers used by the dashboards and the background services
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from nse_client import derivatives, capital_market
+
+# Indices supported by the dashboards
+INDICES = ('NIFTY', 'BANKNIFTY', 'FINNIFTY')
+
+# Name of each index in the NSE market watch (used for the spot price)
+SPOT_NAMES = {
+    'NIFTY': 'NIFTY 50',
+    'BANKNIFTY': 'NIFTY BANK',
+    'FINNIFTY': 'NIFTY FINANCIAL SERVICES',
+}
+
+# Strike step and +/- range around the spot price used for option analysis
+STRIKE_WINDOWS = {
+    'NIFTY': (50, 1000),
+    'BANKNIFTY': (100, 1500),
+    'FINNIFTY': (50, 900),
+}
+
+# nselib column names -> short names used across the dashboards
+CHAIN_COLUMNS = {
+    'CALLS_OI': 'CE_OI',
+    'CALLS_Chng_in_OI': 'CE_CHG_OI',
+    'CALLS_LTP': 'CE_LTP',
+    'PUTS_OI': 'PE_OI',
+    'PUTS_Chng_in_OI': 'PE_CHG_OI',
+    'PUTS_LTP': 'PE_LTP',
+}
+
+# Traded volume (cumulative for the day), kept when the chain has it
+VOLUME_COLUMNS = {
+    'CALLS_Volume': 'CE_VOLUME',
+    'PUTS_Volume': 'PE_VOLUME',
+}
+
+
+def expiry_dates(index):
+    # Expiry dates of an index in NSE format (dd-Mon-YYYY), nearest first
+    return derivatives.expiry_dates_option_index()[index]
+
+
+def to_chain_expiry(ex):
+    # nselib wants the expiry as dd-mm-YYYY for the live option chain
+    return datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
+
+
+def fetch_option_chain(index, exp):
+    # Live option chain indexed by strike with CE_/PE_ column names
+    option = derivatives.nse_live_option_chain(index, exp)
+    columns = ['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']
+    columns += [column for column in VOLUME_COLUMNS if column in option.columns]
+    o = option[columns].set_index('Strike_Price')
+    o = o.rename(columns={**CHAIN_COLUMNS, **VOLUME_COLUMNS})
+    return o.apply(pd.to_numeric, errors='coerce').fillna(0)
+
+
+def spot_price(index):
+    return capital_market.market_watch_all_indices().set_index('index').loc[SPOT_NAMES[index], 'last']
+
+
+def strike_window(o, index, cmp):
+    # Strikes within the analysis range around the rounded spot price
+    step, width = STRIKE_WINDOWS[index]
+    atm = int(np.round(cmp / step)) * step
+    return o.loc[atm - width:atm + width]
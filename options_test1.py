@@ -1,10 +1,9 @@
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
+from nse_client import derivatives, capital_market
 from datetime import datetime
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
 import time
 
 # Add title of the web-app
@@ -17,11 +16,10 @@ tab1, tab2, tab3, tab4 = st.tabs(["Option Chain", "OI Analysis", "Ratio Strategy
 # Create side bar to select index instrument and for expiry day selection
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
 ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
 
 # Extracting data from nselib library
 try:
-    option = derivatives.nse_live_option_chain(index, exp)
+    option = snapshots.option_chain(index, ex)
     
     # Rename columns and add time column (hh:mm format)
     o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
@@ -60,6 +58,7 @@ try:
     # Tab 2: OI Analysis
     with tab2:
         st.subheader('Open Interest Analysis')
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(2, 1)
         ax[0].bar(oi.index, oi['CE_OI'], color='blue', width=20)
         ax[0].bar(oi.index - 10, oi['PE_OI'], color='red', width=20)
@@ -0,0 +1,39 @@
+# Admin panel: hot-path stage timings, data freshness, upstream request counts and session
+# memory of this server process
+import os
+import streamlit as st
+import metrics
+import nse_client
+import session_store
+
+st.title(':red[Admin] **Performance Metrics**')
+metrics.start_http_server()
+
+col1, col2 = st.columns(2)
+col1.metric('**NSE requests sent**', nse_client.client.requests_sent)
+col2.metric('**Prometheus endpoint**', f":{os.environ.get('METRICS_PORT', 9464)}/metrics")
+
+st.subheader('Stage timings (ms)')
+summary = metrics.metrics.summary()
+index = st.selectbox('Index', ['All'] + sorted(summary['Index'].unique().tolist()))
+if index != 'All':
+    summary = summary[summary['Index'] == index]
+st.dataframe(summary.round(2), use_container_width=True)
+
+st.subheader('Data freshness')
+st.dataframe(metrics.metrics.snapshot_ages().round(1), use_container_width=True)
+
+st.subheader('Session memory')
+sessions = session_store.memory_report()
+col1, col2, col3 = st.columns(3)
+col1.metric('**Sessions**', sessions['Session'].nunique())
+col2.metric('**Rows held**', int(sessions['Rows'].sum()))
+col3.metric('**Server total (MB)**', round(sessions['Bytes'].sum() / 2 ** 20, 2))
+per_session = sessions.groupby('Session').agg(Rows=('Rows', 'sum'), Bytes=('Bytes', 'sum'), Idle_s=('Idle_s', 'min'))
+st.dataframe(per_session.sort_values('Bytes', ascending=False), use_container_width=True)
+st.dataframe(sessions, use_container_width=True)
+st.caption(f'Containers are capped at {session_store.DEFAULT_MAX_ROWS} rows by default; sessions idle for '
+           f'{session_store.IDLE_SECONDS // 60} min keep their latest {session_store.IDLE_KEEP_ROWS} rows.')
+
+with st.expander('Prometheus text'):
+    st.code(metrics.metrics.prometheus_text())
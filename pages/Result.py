@@ -1,35 +1,15 @@
 # installing important libraries
 import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import scraper
 
 # adding title of the page
 st.title(':red[Quaterly Result] for :blue[Today]')
 
-# extracting todays result announcement data from economic-times website using requests library
+# extracting todays result announcement data from economic-times website through the shared
+# scraper (cached, revalidated with conditional requests, parsed with lxml only on change)
 url = "https://economictimes.indiatimes.com/markets/stocks/mcalendar.cms"
-response = requests.get(url)
-
-# use beautiful soup to extract table data
-soup = BeautifulSoup(response.content, 'html.parser')
-table = soup.find('table', class_="event_table")
-if table:
-    # Extract data from the table
-    rows = table.find_all('tr')
-    table_data = []
-
-    for row in rows:
-        columns = row.find_all(['td', 'th'])
-        row_data = [column.get_text(strip=True) for column in columns]
-        table_data.append(row_data)
-
-    # Remove any empty rows from the table data
-    table_data = [row for row in table_data if any(row)]
-
-    # Convert the table data into a DataFrame
-    df = pd.DataFrame(table_data[1:], columns=table_data[0])
-
+df = scraper.get_table(url, 'result-calendar', lambda content: scraper.parse_table(content, class_="event_table"))
+if df is not None:
     # Print the DataFrame
     st.table(df)
 else:
@@ -0,0 +1,68 @@
+# Cross-sectional backtest of the unusual-volume strategy over a whole universe: prices
+# are aligned into date x symbol matrices and every step is a matrix operation
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+def price_matrix(price_data, field='Close'):
+    # {symbol: bars} -> date x symbol matrix of one OHLCV field
+    columns = {symbol: bars[field] for symbol, bars in price_data.items() if not bars.empty}
+    if not columns:
+        return pd.DataFrame()
+    matrix = pd.concat(columns, axis=1).sort_index()
+    return matrix.astype(float)
+
+
+def unusual_volume_signals(close, volume, window=20, spike=2.0, above_vwap=True):
+    # Unusual volume (> spike x rolling average) on the same bars for every symbol,
+    # optionally only while the close is above the cumulative VWAP (swing buy signal)
+    average_volume = indicators.rolling_mean(volume, window).bfill()
+    signals = volume > spike * average_volume
+    if above_vwap:
+        signals &= close > indicators.vwap(close, volume)
+    return signals
+
+
+def backtest_portfolio(close, signals, capital=20000, hold_days=1, max_weight=0.2, cost=0.001):
+    """
+    Every signal buys the symbol on the next bar and holds it for hold_days bars.
+    Capital is split equally across the open positions (at most max_weight each, the
+    rest stays in cash) and rebalanced daily; `cost` is charged on turnover.
+    """
+    returns = close.pct_change().fillna(0)
+    entries = signals.shift(1, fill_value=False).astype(float)  # signal occurs on the previous day
+    positions = entries.rolling(window=hold_days, min_periods=1).max().fillna(0)
+    positions = positions.where(close.notna(), 0)
+
+    open_positions = positions.sum(axis=1)
+    weight = np.minimum(1 / open_positions.replace(0, np.nan), max_weight).fillna(0)
+    weights = positions.mul(weight, axis=0)
+
+    turnover = weights.diff().abs().sum(axis=1).fillna(weights.abs().sum(axis=1))
+    portfolio_returns = (weights * returns).sum(axis=1) - cost * turnover
+    equity = capital * (1 + portfolio_returns).cumprod()
+    return {
+        'weights': weights,
+        'returns': portfolio_returns,
+        'equity': equity,
+        'allocation': weights.iloc[-1] * equity.iloc[-1] if len(equity) else pd.Series(dtype=float),
+        'contribution': (weights * returns).sum(),
+    }
+
+
+def performance(portfolio_returns, equity, capital=20000, periods_per_year=252):
+    # NaN metrics for an empty backtest (empty universe or date range, failed downloads)
+    if equity.empty:
+        return dict.fromkeys(['Total Return', 'CAGR', 'Max Drawdown', 'Sharpe', 'Days Invested'], np.nan)
+    drawdown = equity / equity.cummax() - 1
+    years = max(len(equity), 1) / periods_per_year
+    volatility = portfolio_returns.std() * np.sqrt(periods_per_year)
+    return {
+        'Total Return': equity.iloc[-1] / capital - 1,
+        'CAGR': (equity.iloc[-1] / capital) ** (1 / years) - 1,
+        'Max Drawdown': drawdown.min(),
+        'Sharpe': portfolio_returns.mean() * periods_per_year / volatility if volatility > 0 else np.nan,
+        'Days Invested': float((portfolio_returns != 0).mean()),
+    }
@@ -0,0 +1,128 @@
+# Headless OI scanner: runs the analysis of the option dashboard (strike window, signals,
+# top change in OI, PCR, ratio spreads, OI change alerts) for the chosen indices and
+# expiries and writes the tables to files, once or every --interval seconds. Imports no
+# streamlit / matplotlib, so it is cheap to run from cron.
+#
+#   python scanner.py                                    # every index, nearest expiry, CSV
+#   python scanner.py --index NIFTY BANKNIFTY --expiries 2 --format parquet
+#   python scanner.py --interval 180 --count 125 --output scans
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+import oi_analytics
+import option_data
+
+logger = logging.getLogger(__name__)
+indian_tz = pytz.timezone('Asia/Kolkata')
+
+FORMATS = ('csv', 'parquet', 'json')
+TABLES = ('summary', 'signals', 'top_oi_change', 'ratio_spreads', 'alerts')
+
+
+def scan(index, ex, cmp, now=None):
+    """
+    Tables of one index/expiry as {table: DataFrame}; every table starts with Index,
+    Expiry and Timestamp columns so the scans of several chains can be concatenated.
+    """
+    now = now or datetime.now(indian_tz)
+    o = option_data.fetch_option_chain(index, option_data.to_chain_expiry(ex))
+    oi = option_data.strike_window(o, index, cmp).copy()
+    oi['Signal'] = oi_analytics.signals(oi)
+    counts = oi['Signal'].value_counts()
+    tables = {
+        'summary': pd.DataFrame([{
+            'Spot': cmp, 'PCR': oi_analytics.pcr(o), 'Window_PCR': oi_analytics.pcr(oi),
+            'Strikes': len(oi), 'BUY_CE': int(counts.get('BUY CE', 0)), 'BUY_PE': int(counts.get('BUY PE', 0)),
+        }]),
+        'signals': oi,
+        'top_oi_change': oi.loc[oi_analytics.top_oi_change(oi)],
+        'ratio_spreads': oi_analytics.ratio_spreads(o, index, cmp),
+        'alerts': oi_analytics.oi_change_alerts(oi),
+    }
+    for name, table in tables.items():
+        if name != 'summary':
+            table = table.rename_axis('Strike_Price').reset_index()
+        table.insert(0, 'Timestamp', now.strftime('%Y-%m-%d %H:%M:%S'))
+        table.insert(0, 'Expiry', ex)
+        table.insert(0, 'Index', index)
+        tables[name] = table
+    return tables
+
+
+def scan_all(indices, expiries_per_index=1, expiry=None):
+    # {table: DataFrame} over every index and its nearest expiries (or the given expiry)
+    now = datetime.now(indian_tz)
+    scans = []
+    for index in indices:
+        try:
+            cmp = option_data.spot_price(index)
+            expiries = [expiry] if expiry else option_data.expiry_dates(index)[:expiries_per_index]
+        except Exception:
+            logger.exception('Could not load spot/expiries for %s', index)
+            continue
+        for ex in expiries:
+            try:
+                scans.append(scan(index, ex, cmp, now))
+            except Exception:
+                logger.exception('Could not scan %s %s', index, ex)
+    return {name: pd.concat([s[name] for s in scans], ignore_index=True) for name in TABLES} if scans else {}
+
+
+def write_tables(tables, output, fmt, stamp):
+    # One file per table: <output>/<stamp>/<table>.<fmt>; returns the paths written
+    directory = os.path.join(output, stamp)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(directory, f'{name}.{fmt}')
+        if fmt == 'parquet':
+            table.to_parquet(path, index=False)
+        elif fmt == 'json':
+            table.to_json(path, orient='records', indent=2)
+        else:
+            table.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan option chains for OI signals without the dashboard')
+    parser.add_argument('--index', nargs='+', default=list(option_data.INDICES), choices=option_data.INDICES)
+    parser.add_argument('--expiries', type=int, default=1, help='nearest expiries scanned per index')
+    parser.add_argument('--expiry', help='scan this expiry (dd-Mon-YYYY) instead of the nearest ones')
+    parser.add_argument('--format', default='csv', choices=FORMATS)
+    parser.add_argument('--output', default='scans', help='directory of the scan results')
+    parser.add_argument('--interval', type=float, default=0, help='seconds between scans (default: scan once)')
+    parser.add_argument('--count', type=int, help='stop after this many scans (default: forever with --interval)')
+    params = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    done = 0
+    while True:
+        started = time.time()
+        tables = scan_all(params.index, params.expiries, params.expiry)
+        if tables:
+            stamp = datetime.now(indian_tz).strftime('%Y%m%d_%H%M%S')
+            paths = write_tables(tables, params.output, params.format, stamp)
+            logger.info('Scanned %d chains in %.1fs -> %s', tables['summary'].shape[0], time.time() - started,
+                        os.path.dirname(paths[0]))
+        else:
+            logger.warning('Nothing scanned')
+        done += 1
+        if not params.interval or (params.count and done >= params.count):
+            return 0 if tables else 1
+        try:
+            time.sleep(max(0.0, params.interval - (time.time() - started)))
+        except KeyboardInterrupt:
+            return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
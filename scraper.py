@@ -0,0 +1,113 @@
+# Shared scraping layer for the pages/: one pooled keep-alive session, an in-memory TTL
+# cache with conditional requests (ETag / If-Modified-Since) and a versioned on-disk copy
+# of every parsed table
+import hashlib
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.environ.get('SCRAPE_CACHE_DIR', '.scrape_cache')
+HEADERS = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'}
+
+session = requests.Session()
+session.headers.update(HEADERS)
+session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# url -> {'table', 'etag', 'last_modified', 'checked_at', 'digest', 'version'}
+_cache = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(url):
+    with _locks_guard:
+        return _locks.setdefault(url, threading.Lock())
+
+
+def parse_table(content, **attrs):
+    # First <table> matching attrs as a DataFrame (header row -> columns), None if absent;
+    # only <table> elements are parsed, with the lxml parser (bs4 is imported on first parse)
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(content, 'lxml', parse_only=SoupStrainer('table', **attrs))
+    table = soup.find('table')
+    if not table:
+        return None
+    table_data = []
+    for row in table.find_all('tr'):
+        columns = row.find_all(['td', 'th'])
+        table_data.append([column.get_text(strip=True) for column in columns])
+
+    # Remove any empty rows from the table data
+    table_data = [row for row in table_data if any(row)]
+    if not table_data:
+        return None
+    return pd.DataFrame(table_data[1:], columns=table_data[0])
+
+
+def _store(name, entry):
+    # Keep every version of the parsed table on disk, plus the latest one
+    folder = os.path.join(CACHE_DIR, re.sub(r'[^A-Za-z0-9_-]', '_', name))
+    os.makedirs(folder, exist_ok=True)
+    pd.to_pickle(entry, os.path.join(folder, f"v{entry['version']:05d}.pkl"))
+    pd.to_pickle(entry, os.path.join(folder, 'latest.pkl'))
+
+
+def _load(name):
+    path = os.path.join(CACHE_DIR, re.sub(r'[^A-Za-z0-9_-]', '_', name), 'latest.pkl')
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def get_table(url, name, parse, ttl=900, timeout=10):
+    """
+    Parsed table of `url`, served from memory while younger than `ttl` seconds. After
+    that the page is revalidated with a conditional request and only re-parsed when
+    it changed. Falls back to the last stored copy if the site cannot be reached.
+    """
+    with _lock_for(url):
+        entry = _cache.get(url) or _load(name)
+        if entry is not None and time.time() - entry['checked_at'] < ttl:
+            _cache[url] = entry
+            return entry['table']
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException:  # unreachable, or an error status (HTTPError)
+            if entry is None:
+                raise
+            # serve the stored copy for another `ttl` instead of waiting on every rerun
+            _cache[url] = dict(entry, checked_at=time.time())
+            return entry['table']
+
+        if response.status_code == 304 and entry is not None:
+            entry = dict(entry, checked_at=time.time())
+        else:
+            digest = hashlib.sha1(response.content).hexdigest()
+            if entry is not None and entry['digest'] == digest:
+                entry = dict(entry, checked_at=time.time())
+            else:
+                entry = {
+                    'table': parse(response.content),
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'checked_at': time.time(),
+                    'digest': digest,
+                    'version': 1 if entry is None else entry['version'] + 1,
+                }
+                _store(name, entry)
+        _cache[url] = entry
+        return entry['table']
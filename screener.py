@@ -1,10 +1,10 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import datetime
+import forecasting
+import ohlcv_store
+import stock_screener
+from swing_strategy import add_volume_indicators, backtest, swing_trade_signals, predict_holding_period, holding_periods
 
 st.title('Positional Trading Strategy with Backtesting')
 
@@ -28,64 +28,13 @@ start_date = st.sidebar.date_input('Start Date', pd.to_datetime('2022-01-01'))
 end_date = st.sidebar.date_input('End Date', pd.to_datetime('today'))
 
 
-# Fetch data
+# Fetch data (served from the local OHLCV store, only missing bars are downloaded)
 def fetch_data(ticker, start_date, end_date, interval='1d'):
-    return yf.download(ticker, start=start_date, end=end_date, interval=interval)
-
-
-# Calculate VWAP
-def calculate_vwap(data):
-    q = data['Volume'].values
-    p = data['Close'].values
-    vwap = (p * q).cumsum() / q.cumsum()
-    return vwap
-
-
-# Backtest Strategy
-def backtest(data):
-    signals = data['Unusual Volume'].shift(1)  # Signal occurs on the previous day
-    data['Signal'] = signals
-    data['Daily Return'] = data['Close'].pct_change()
-    data['Strategy Return'] = data['Daily Return'] * data['Signal']
-    data['Cumulative Market Return'] = (1 + data['Daily Return']).cumprod()
-    data['Cumulative Strategy Return'] = (1 + data['Strategy Return']).cumprod()
-    return data
-
-
-# Swing Trading Signals
-def swing_trade_signals(data):
-    data = data.copy()
-    data['Unusual Volume'].fillna(False, inplace=True)
-    data['Close'].fillna(method='ffill', inplace=True)
-    data['VWAP'].fillna(method='ffill', inplace=True)
-    buy_signals = (data['Unusual Volume'] & (data['Close'] > data['VWAP'])).astype(bool)
-    buy_signals.fillna(False, inplace=True)
-    data['Buy Signal'] = buy_signals.shift(1)  # Signal occurs on the previous day
-    return data
-
-
-# Predict target holding period
-def predict_holding_period(data):
-    buy_signals = data[data['Buy Signal']]
-    holding_periods = []
-    for idx in buy_signals.index:
-        buy_price = data.loc[idx, 'Close']
-        target_price = buy_price * 1.05
-        future_prices = data.loc[idx:]['Close']
-        days_to_target = (future_prices >= target_price).idxmax() - idx
-        holding_periods.append(days_to_target.days)
-    if holding_periods:
-        return int(np.mean(holding_periods))
-    else:
-        return 20  # Default to 20 days if no historical signals
-
-
-# Forecast Prices
-def forecast_prices(data, periods=5):
-    model = ExponentialSmoothing(data['Close'], trend='add', seasonal=None)
-    fit = model.fit()
-    forecast = fit.forecast(periods)
-    return forecast
+    return ohlcv_store.load_ohlcv([ticker], start_date, end_date, interval=interval)[ticker]
+
+
+# Load every symbol used on this page in one batched call
+price_data = ohlcv_store.load_ohlcv(tickers + nifty50_symbols, start_date, end_date, interval='1d')
 
 
 # Tab Interface
@@ -93,24 +42,24 @@ tab1, tab2, tab3, tab4 = st.tabs(["Analysis", "Trading Signals", "Institutional
 
 with tab1:
     st.subheader('Analysis')
+    # Fit all selected tickers in parallel; unchanged tickers come from the forecast cache
+    forecasts = forecasting.forecast_many({ticker: price_data[ticker]['Close'] for ticker in tickers
+                                           if not price_data[ticker].empty})
     for ticker in tickers:
-        data = fetch_data(ticker, start_date, end_date, interval='1d')
+        data = price_data[ticker].copy()
         if data.empty:
             continue
 
         # Calculate indicators
-        data['VWAP'] = calculate_vwap(data)
-        data['Average Volume'] = data['Volume'].rolling(window=20).mean()
-        data['Average Volume'].fillna(method='bfill', inplace=True)
-        data['Unusual Volume'] = data['Volume'] > 2 * data['Average Volume']
-        data['Unusual Volume'].fillna(False, inplace=True)
+        data = add_volume_indicators(data, symbol=ticker)
 
         # Backtest and Forecast
         backtested_data = backtest(data)
-        forecast = forecast_prices(data)
+        forecast = forecasts[ticker]
         forecast_index = pd.date_range(start=data.index[-1], periods=len(forecast) + 1, closed='right')
 
         # Plotting
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(4, 1, figsize=(14, 18))
 
         # Plot Close Price and VWAP
@@ -145,16 +94,12 @@ with tab1:
 with tab2:
     st.subheader('Trading Signals')
     for ticker in tickers:
-        data = fetch_data(ticker, start_date, end_date, interval='1d')
+        data = price_data[ticker].copy()
         if data.empty:
             continue
 
         # Calculate indicators
-        data['VWAP'] = calculate_vwap(data)
-        data['Average Volume'] = data['Volume'].rolling(window=20).mean()
-        data['Average Volume'].fillna(method='bfill', inplace=True)
-        data['Unusual Volume'] = data['Volume'] > 2 * data['Average Volume']
-        data['Unusual Volume'].fillna(False, inplace=True)
+        data = add_volume_indicators(data, symbol=ticker)
 
         swing_data = swing_trade_signals(data)
         swing_data['Buy Signal'].fillna(False, inplace=True)
@@ -168,6 +113,14 @@ with tab2:
         hold_period = predict_holding_period(swing_data)  # Predict hold period for swing trades
         st.write(f"Suggested Hold Period: {hold_period} days")
 
+        # Distribution of holding periods with stop-loss, several targets and a maximum holding period
+        periods = holding_periods(swing_data, targets=(0.05, 0.10), stop_loss=0.03, max_holding=60)
+        if not periods.empty:
+            st.write("Holding Period Distribution (5%/10% targets, 3% stop-loss, 60 bars max):")
+            st.write(periods['Holding Days'].describe(percentiles=[0.25, 0.5, 0.75, 0.9]).to_frame().T)
+            st.write(periods['Exit Reason'].value_counts().to_frame().T)
+            st.bar_chart(periods['Holding Days'].round().value_counts().sort_index())
+
 with tab3:
     st.subheader('Institutional Analysis')
     st.write("Institutional analysis tab is under construction.")
@@ -175,45 +128,11 @@ with tab3:
 with tab4:
     st.subheader('Stock Screener')
 
-    screener_data = []
-
-    for symbol in nifty50_symbols:
-        data = fetch_data(symbol, start_date, end_date, interval='1d')
-        if data.empty:
-            continue
-
-        # Ensure 'Unusual Volume' and 'VWAP' are calculated
-        data['VWAP'] = calculate_vwap(data)
-        data['Average Volume'] = data['Volume'].rolling(window=20).mean()
-        data['Average Volume'].fillna(method='bfill', inplace=True)
-        data['Unusual Volume'] = data['Volume'] > 2 * data['Average Volume']
-        data['Unusual Volume'].fillna(False, inplace=True)
-
-        swing_data = swing_trade_signals(data)
-        swing_data['Buy Signal'].fillna(False, inplace=True)
-
-        if swing_data['Buy Signal'].any():
-            recent_signal = swing_data[swing_data['Buy Signal']].tail(1)
-            if not recent_signal.empty:
-                last_signal_date = recent_signal.index[-1]
-                buy_price = recent_signal['Close'].values[0]
-                holding_target = buy_price * 1.05  # Assuming a 5% holding target
-                current_price = data['Close'][-1]
-                target_achieved = current_price >= holding_target
-                profit_loss = (current_price - buy_price) * 20  # Qty = 20
-                screener_data.append({
-                    'Symbol': symbol,
-                    'Buy Signal Date': last_signal_date,
-                    'Buy Price': buy_price,
-                    'Holding Target': holding_target,
-                    'Current Price': current_price,
-                    'Qty': 20,
-                    'Profit/Loss': profit_loss,
-                    'Target Achieved': target_achieved
-                })
-
-    screener_df = pd.DataFrame(screener_data,
-                               columns=['Symbol', 'Buy Signal Date', 'Buy Price', 'Holding Target', 'Current Price',
-                                        'Qty', 'Profit/Loss', 'Target Achieved'])
+    # Rows stream in as tickers finish; tickers whose bars did not change come from the cache
     st.write("Stocks with Active Buy Signals:")
-    st.write(screener_df)
+    screener_table = st.empty()
+    screener_data = []
+    screener_table.write(pd.DataFrame(screener_data, columns=stock_screener.SCREENER_COLUMNS))
+    for row in stock_screener.screen({symbol: price_data[symbol] for symbol in nifty50_symbols}):
+        screener_data.append(row)
+        screener_table.write(pd.DataFrame(screener_data, columns=stock_screener.SCREENER_COLUMNS))
@@ -0,0 +1,183 @@
+# Bounded per-session containers for st.session_state: row buffers and DataFrames with a
+# row cap (oldest rows are evicted), a server-wide registry for memory accounting and a
+# background trimmer that shrinks the containers of sessions left idle
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Row cap of every container unless CAPS names another one for its key; None never
+# evicts (the portfolio is a list of positions, not a rolling buffer)
+DEFAULT_MAX_ROWS = int(os.environ.get('SESSION_MAX_ROWS', 5000))
+CAPS = {'signal_history': 10000, 'portfolio': None}
+# Sessions without a rerun for IDLE_SECONDS keep only their latest IDLE_KEEP_ROWS rows
+IDLE_SECONDS = int(os.environ.get('SESSION_IDLE_SECONDS', 1800))
+IDLE_KEEP_ROWS = int(os.environ.get('SESSION_IDLE_KEEP_ROWS', 200))
+TRIM_EVERY = 60
+
+
+class RowBuffer(deque):
+    # List of rows with a cap: appending to a full buffer evicts the oldest row
+    def __init__(self, rows=(), maxlen=None):
+        super().__init__(rows, maxlen)
+        self.evicted = 0
+
+    def append(self, row):
+        if len(self) == self.maxlen:
+            self.evicted += 1
+        super().append(row)
+
+    def trim(self, keep):
+        while len(self) > keep:
+            self.popleft()
+            self.evicted += 1
+
+
+class _Session:
+    def __init__(self, state):
+        self.state = state
+        self.last_seen = time.time()
+        self.keys = {}  # name -> {'cap', 'trim_idle', 'evicted'}
+
+
+_sessions = {}
+_lock = threading.Lock()
+_trimmer = None
+
+
+def _track(name, cap, trim_idle):
+    # Register `name` of the current session and mark the session as active
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    with _lock:
+        session = _sessions.get(ctx.session_id)
+        if session is None:
+            session = _sessions[ctx.session_id] = _Session(ctx.session_state)
+        session.last_seen = time.time()
+        info = session.keys.setdefault(name, {'evicted': 0})
+        info.update(cap=cap, trim_idle=trim_idle)
+    _start_trimmer()
+    return info
+
+
+def _cap(name, max_rows):
+    return max_rows if max_rows is not None else CAPS.get(name, DEFAULT_MAX_ROWS)
+
+
+def row_buffer(name, max_rows=None, trim_idle=True):
+    """
+    st.session_state[name] as a RowBuffer (created, or converted from a plain list),
+    capped at max_rows / CAPS[name] / SESSION_MAX_ROWS rows.
+    """
+    cap = _cap(name, max_rows)
+    buffer = st.session_state.get(name)
+    if not isinstance(buffer, RowBuffer) or buffer.maxlen != cap:
+        buffer = RowBuffer(buffer or (), maxlen=cap)
+        st.session_state[name] = buffer
+    _track(name, cap, trim_idle)
+    return buffer
+
+
+def append_rows(name, rows, max_rows=None, trim_idle=True):
+    # Append a DataFrame of rows to the DataFrame st.session_state[name], keeping the latest rows
+    cap = _cap(name, max_rows)
+    frame = st.session_state.get(name)
+    frame = rows.reset_index(drop=True) if frame is None else pd.concat([frame, rows], ignore_index=True)
+    info = _track(name, cap, trim_idle)
+    if cap is not None and len(frame) > cap:
+        if info is not None:
+            info['evicted'] += len(frame) - cap
+        frame = frame.iloc[-cap:].reset_index(drop=True)
+    st.session_state[name] = frame
+    return frame
+
+
+def _rows(obj):
+    return len(obj) if isinstance(obj, (pd.DataFrame, deque, list)) else None
+
+
+def nbytes(obj):
+    # Approximate memory of a container: deep DataFrame usage, or the rows and their values
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (deque, list)):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+                                        if isinstance(row, (list, tuple)) else sys.getsizeof(row) for row in obj)
+    return sys.getsizeof(obj)
+
+
+def memory_report(now=None):
+    # One row per tracked container of every session, largest first
+    now = time.time() if now is None else now
+    with _lock:
+        sessions = list(_sessions.items())
+    rows = []
+    for session_id, session in sessions:
+        for name, info in list(session.keys.items()):
+            try:
+                obj = session.state[name]
+            except KeyError:
+                continue
+            evicted = obj.evicted if isinstance(obj, RowBuffer) else info['evicted']
+            rows.append([session_id[:8], name, _rows(obj), info['cap'], evicted, nbytes(obj),
+                         round(now - session.last_seen)])
+    report = pd.DataFrame(rows, columns=['Session', 'Key', 'Rows', 'Cap', 'Evicted', 'Bytes', 'Idle_s'])
+    return report.sort_values('Bytes', ascending=False).reset_index(drop=True)
+
+
+def _is_active(session_id):
+    try:
+        from streamlit.runtime import Runtime
+        return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+
+def trim_idle_sessions(now=None):
+    # Forget closed sessions and shrink the trimmable containers of idle ones
+    now = time.time() if now is None else now
+    with _lock:
+        for session_id in [sid for sid in _sessions if not _is_active(sid)]:
+            del _sessions[session_id]
+        idle = [session for session in _sessions.values() if now - session.last_seen > IDLE_SECONDS]
+    for session in idle:
+        for name, info in list(session.keys.items()):
+            if not info['trim_idle']:
+                continue
+            try:
+                obj = session.state[name]
+            except KeyError:
+                continue
+            if isinstance(obj, RowBuffer):
+                obj.trim(IDLE_KEEP_ROWS)
+            elif isinstance(obj, pd.DataFrame) and len(obj) > IDLE_KEEP_ROWS:
+                info['evicted'] += len(obj) - IDLE_KEEP_ROWS
+                session.state[name] = obj.iloc[-IDLE_KEEP_ROWS:].reset_index(drop=True)
+
+
+def _run_trimmer():
+    while True:
+        time.sleep(TRIM_EVERY)
+        try:
+            trim_idle_sessions()
+        except Exception:
+            logger.exception('Trimming idle sessions failed')
+
+
+def _start_trimmer():
+    # One trimmer thread per server process, started with the first tracked container
+    global _trimmer
+    if _trimmer is None:
+        with _lock:
+            if _trimmer is None:
+                _trimmer = threading.Thread(target=_run_trimmer, name='session-trimmer', daemon=True)
+                _trimmer.start()
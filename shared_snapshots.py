@@ -0,0 +1,158 @@
+# Latest option-chain snapshot of every index/expiry shared by all server processes on a
+# host through memory-mapped files. One process (holder of the publisher lock) polls NSE
+# and publishes; the others map the files read-only and copy the latest slot (at most
+# MAX_STRIKES rows) instead of re-fetching the chains.
+#
+# File layout (little-endian, fixed size):
+#   header   16 x 8 bytes: magic, version, then per slot (2): strikes, fetched_at, spot, has_volume
+#   slots    2 x MAX_STRIKES x (1 + len(COLUMNS)) float64, row = strike followed by COLUMNS
+# Publishing writes the slot the readers are not using and then bumps `version`; readers
+# copy slot version % 2 and retry when `version` changed meanwhile (a seqlock), since the
+# publish after next overwrites that slot.
+import fcntl
+import mmap
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+import option_data
+
+MAGIC = int.from_bytes(b'OBSNAP01', 'little')
+MAX_STRIKES = 512
+COLUMNS = [*option_data.CHAIN_COLUMNS.values(), *option_data.VOLUME_COLUMNS.values()]
+HEADER_WORDS = 16
+SLOT_META = 4
+
+
+def default_directory():
+    # tmpfs when available, so the "files" never touch the disk
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.environ.get('SHARED_SNAPSHOT_DIR', os.path.join(base, 'option_board'))
+
+
+def _file_size():
+    return 8 * (HEADER_WORDS + 2 * MAX_STRIKES * (1 + len(COLUMNS)))
+
+
+class SnapshotFile:
+    # One index/expiry: header words plus the two data slots, mapped from `path`
+    def __init__(self, path, writable=False):
+        self.path = path
+        if writable and (not os.path.exists(path) or os.path.getsize(path) != _file_size()):
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.truncate(_file_size())
+            words = np.memmap(tmp, dtype='<u8', mode='r+', shape=(HEADER_WORDS,))
+            words[0] = MAGIC
+            words.flush()
+            del words
+            os.replace(tmp, path)
+        with open(path, 'r+b' if writable else 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), _file_size(), access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        self.words = np.frombuffer(self._map, dtype='<u8', count=HEADER_WORDS)
+        self.meta = np.frombuffer(self._map, dtype='<f8', count=HEADER_WORDS)
+        self.slots = np.frombuffer(self._map, dtype='<f8', offset=8 * HEADER_WORDS).reshape(2, MAX_STRIKES, 1 + len(COLUMNS))
+        if self.words[0] != MAGIC:
+            raise ValueError(f'{path} is not a snapshot file')
+
+    @property
+    def version(self):
+        return int(self.words[1])
+
+    def write(self, chain, spot, fetched_at):
+        # Publish one chain (indexed by strike, CE_/PE_ columns) into the idle slot
+        version = self.version
+        slot = (version + 1) % 2
+        n = min(len(chain), MAX_STRIKES)
+        self.slots[slot, :n, 0] = chain.index[:n].astype(float)
+        self.slots[slot, :n, 1:] = chain.iloc[:n].reindex(columns=COLUMNS).to_numpy(dtype=float)
+        has_volume = all(column in chain.columns for column in option_data.VOLUME_COLUMNS.values())
+        self.meta[2 + SLOT_META * slot:2 + SLOT_META * (slot + 1)] = (n, fetched_at, spot, has_volume)
+        self.words[1] = version + 1
+
+    def read(self, retries=100):
+        """
+        (version, chain, spot, fetched_at) of the latest publish, or None before the first.
+        The chain is a copy of the slot taken while `version` did not change.
+        """
+        for _ in range(retries):
+            version = self.version
+            if version == 0:
+                return None
+            slot = version % 2
+            meta = self.meta[2 + SLOT_META * slot:2 + SLOT_META * (slot + 1)].copy()
+            rows = self.slots[slot, :min(int(meta[0]), MAX_STRIKES)].copy()
+            if self.version == version:
+                break
+        else:
+            raise OSError(f'{self.path} kept changing while it was read')
+        n, fetched_at, spot, has_volume = meta
+        width = len(COLUMNS) if has_volume else len(option_data.CHAIN_COLUMNS)
+        chain = pd.DataFrame(rows[:, 1:1 + width], index=pd.Index(rows[:, 0], name='Strike_Price', copy=False),
+                             columns=COLUMNS[:width], copy=False)
+        return version, chain, float(spot), float(fetched_at)
+
+
+class SharedSnapshots:
+    """
+    Directory of snapshot files, one per index/expiry, plus the publisher election:
+    the process holding the exclusive lock on `publisher.lock` fetches and publishes,
+    and a follower takes over as soon as the publisher process exits.
+    """
+
+    def __init__(self, directory=None, check_every=2.0):
+        self.directory = directory or default_directory()
+        self.check_every = check_every
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = {}
+        self._seen = {}
+        self._lock_file = None
+        self._lock = threading.Lock()
+
+    def is_publisher(self):
+        with self._lock:
+            if self._lock_file is None:
+                lock_file = open(os.path.join(self.directory, 'publisher.lock'), 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+                self._lock_file = lock_file
+                # files mapped read-only so far are reopened for writing
+                self._files.clear()
+            return True
+
+    def _path(self, index, expiry):
+        return os.path.join(self.directory, f'{index}_{expiry}.snap')
+
+    def _file(self, index, expiry, writable=False):
+        key = (index, expiry)
+        if key not in self._files:
+            self._files[key] = SnapshotFile(self._path(index, expiry), writable)
+        return self._files[key]
+
+    def publish(self, snaps):
+        # snaps: {(index, expiry): snapshots.Snapshot}
+        for (index, expiry), snap in snaps.items():
+            self._file(index, expiry, writable=True).write(snap.chain, snap.spot, snap.fetched_at)
+
+    def read_new(self):
+        # {(index, expiry): (chain, spot, fetched_at)} published since the last call
+        fresh = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.snap'):
+                continue
+            index, expiry = name[:-len('.snap')].split('_', 1)
+            try:
+                published = self._file(index, expiry).read()
+            except (OSError, ValueError):
+                continue
+            if published is None or published[0] == self._seen.get((index, expiry)):
+                continue
+            self._seen[(index, expiry)] = published[0]
+            fresh[(index, expiry)] = published[1:]
+        return fresh
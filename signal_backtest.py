@@ -0,0 +1,175 @@
+# Vectorized backtest of OI signals: every BUY CE / BUY PE signal is matched (as-of join)
+# with the option LTP of the same strike N minutes later on the same trading day
+import numpy as np
+import pandas as pd
+
+SIGNAL_SIDES = {'BUY CE': 'CE', 'BUY PE': 'PE'}
+# Columns that tell contracts apart besides the strike (recorded since the history has them)
+CONTRACT_COLUMNS = ['Index', 'Expiry']
+
+
+def add_timestamps(df, single_day=False):
+    """
+    Signal history stores 'Time' as hh:mm with the day in 'Date' (or a full timestamp).
+    A history without dates raises ValueError, since its rows cannot be told apart by
+    day, unless `single_day` says it covers one trading day.
+    """
+    if 'Timestamp' in df.columns:
+        return df
+    time = df['Time'].astype(str)
+    if 'Date' in df.columns:
+        time = df['Date'].astype('string') + ' ' + time
+    elif not single_day and not time.str.contains('-').all():
+        raise ValueError('The signal history has no Date column, so rows of different days cannot be told apart')
+    df = df.copy()
+    df['Timestamp'] = pd.to_datetime(time, errors='coerce')
+    return df.dropna(subset=['Timestamp'])
+
+
+def contract_keys(*frames):
+    # Strike plus the contract columns every frame has
+    return ['Strike_Price'] + [column for column in CONTRACT_COLUMNS if all(column in f.columns for f in frames)]
+
+
+def match_exits(signals, prices=None, horizon=15):
+    # Every BUY CE / BUY PE signal with its exit row of the same day (NaN Exit_LTP when
+    # there is none yet, or none before the close)
+    signals = add_timestamps(signals)
+    prices = signals if prices is None else add_timestamps(prices)
+    keys = contract_keys(signals, prices)
+
+    trades = signals[signals['Signal'].isin(list(SIGNAL_SIDES)).to_numpy()]
+    trades = trades[[*keys, 'Signal', 'Timestamp', 'CE_LTP', 'PE_LTP']].copy()
+    is_ce = (trades['Signal'] == 'BUY CE').to_numpy()
+    trades['Entry_LTP'] = np.where(is_ce, trades['CE_LTP'], trades['PE_LTP'])
+    trades['Exit_Target'] = trades['Timestamp'] + pd.Timedelta(minutes=horizon)
+
+    exits = prices[[*keys, 'Timestamp', 'CE_LTP', 'PE_LTP']].rename(columns={
+        'Timestamp': 'Exit_Time', 'CE_LTP': 'Exit_CE_LTP', 'PE_LTP': 'Exit_PE_LTP'
+    })
+    for frame in (trades, exits):
+        frame['Strike_Price'] = frame['Strike_Price'].astype(float)
+        for column in keys[1:]:
+            frame[column] = frame[column].astype(str)
+    exits = exits.drop_duplicates([*keys, 'Exit_Time'], keep='last').sort_values('Exit_Time')
+    trades['Day'] = trades['Timestamp'].dt.normalize()
+    exits['Day'] = exits['Exit_Time'].dt.normalize()
+
+    trades = pd.merge_asof(trades.sort_values('Exit_Target'), exits, left_on='Exit_Target', right_on='Exit_Time',
+                           by=[*keys, 'Day'], direction='forward').drop(columns='Day')
+    is_ce = (trades['Signal'] == 'BUY CE').to_numpy()
+    trades['Exit_LTP'] = np.where(is_ce, trades['Exit_CE_LTP'], trades['Exit_PE_LTP'])
+    return trades[trades['Entry_LTP'] > 0]
+
+
+def forward_returns(signals, prices=None, horizon=15):
+    """
+    One row per BUY CE / BUY PE signal with the entry LTP, the LTP of the same contract
+    (strike, and index/expiry when recorded) and side at the first row at least `horizon`
+    minutes later on the same day, and the forward return. `prices` defaults to the signal history itself
+    (its later rows); a snapshot archive with the same columns can be passed instead.
+    """
+    trades = match_exits(signals, prices, horizon).dropna(subset=['Exit_LTP'])
+    return _returns(trades)
+
+
+def _returns(trades):
+    trades = trades.copy()
+    trades['Return'] = trades['Exit_LTP'] / trades['Entry_LTP'] - 1
+    trades['Outcome'] = np.where(trades['Return'] > 0, 'Win', 'Loss')
+    keys = [column for column in ['Strike_Price', *CONTRACT_COLUMNS] if column in trades.columns]
+    return trades[[*keys, 'Signal', 'Timestamp', 'Entry_LTP', 'Exit_Time', 'Exit_LTP', 'Return', 'Outcome']]
+
+
+class BacktestTotals:
+    """
+    Running sums per (strike, signal) so results can be aggregated chunk by chunk:
+    signal counts, trades, wins/losses and the sums of their returns.
+    """
+
+    def __init__(self):
+        self.signal_counts = None
+        self.totals = None
+
+    def add_signals(self, chunk):
+        counts = chunk.groupby(['Strike_Price', 'Signal'], observed=True).size()
+        self.signal_counts = counts if self.signal_counts is None else self.signal_counts.add(counts, fill_value=0)
+
+    def add_trades(self, trades):
+        win = trades['Return'] > 0
+        sums = pd.DataFrame({
+            'Strike_Price': trades['Strike_Price'],
+            'Signal': trades['Signal'].astype(str),
+            'Trades': 1,
+            'Wins': win.astype(int),
+            'Return': trades['Return'],
+            'Win_Return': trades['Return'].where(win, 0),
+            'Loss_Return': trades['Return'].where(~win, 0),
+        }).groupby(['Strike_Price', 'Signal']).sum()
+        self.totals = sums if self.totals is None else self.totals.add(sums, fill_value=0)
+        return self
+
+    def summary(self, by=('Strike_Price', 'Signal')):
+        # Trades, win rate, average win/loss and expectancy (mean forward return) per group
+        if self.totals is None:
+            return pd.DataFrame(columns=['Trades', 'Win_Rate', 'Avg_Win', 'Avg_Loss', 'Expectancy'])
+        totals = self.totals.groupby(level=list(by)).sum()
+        losses = totals['Trades'] - totals['Wins']
+        return pd.DataFrame({
+            'Trades': totals['Trades'].astype(int),
+            'Win_Rate': totals['Wins'] / totals['Trades'],
+            'Avg_Win': totals['Win_Return'] / totals['Wins'].replace(0, np.nan),
+            'Avg_Loss': totals['Loss_Return'] / losses.replace(0, np.nan),
+            'Expectancy': totals['Return'] / totals['Trades'],
+        })
+
+    def counts(self, column):
+        # Strike x signal table of signals ('Signals'), wins ('Wins') or losses ('Losses')
+        if column == 'Signals':
+            if self.signal_counts is None:
+                return pd.DataFrame()
+            return self.signal_counts.astype(int).unstack(fill_value=0)
+        if self.totals is None:
+            return pd.DataFrame()
+        values = self.totals['Wins'] if column == 'Wins' else self.totals['Trades'] - self.totals['Wins']
+        return values.astype(int).unstack(fill_value=0)
+
+
+def summarize(trades, by=('Strike_Price', 'Signal')):
+    return BacktestTotals().add_trades(trades).summary(by)
+
+
+def stream_backtest(chunks, horizon=15, single_day=False):
+    """
+    Backtests chunks of a time-ordered signal history with bounded memory. Signals whose
+    exit time lies inside the rows read so far, or whose day has ended, are settled; the
+    remaining rows (the last `horizon` minutes) are carried into the next chunk, and so
+    are settled signals of the latest day whose strike had no row since, so they still
+    find the exit an unchunked run would.
+    """
+    totals = BacktestTotals()
+    carry = None
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        totals.add_signals(chunk)
+        chunk = add_timestamps(chunk, single_day)
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        if frame.empty:
+            continue
+        last = frame['Timestamp'].max()
+        settled = ((frame['Timestamp'] <= last - pd.Timedelta(minutes=horizon)) |
+                   (frame['Timestamp'] < last.normalize())).to_numpy()
+        waiting = []
+        if settled.any():
+            trades = match_exits(frame[settled], prices=frame, horizon=horizon)
+            exited = trades['Exit_LTP'].notna()
+            totals.add_trades(_returns(trades[exited]))
+            keys = contract_keys(frame)
+            # signals of earlier days without an exit never get one
+            pending = ~exited & (trades['Timestamp'] >= last.normalize())
+            waiting = [trades.loc[pending, [*keys, 'Signal', 'Timestamp', 'CE_LTP', 'PE_LTP']]]
+        carry = pd.concat([*waiting, frame[~settled]], ignore_index=True)
+    if carry is not None and not carry.empty:
+        totals.add_trades(forward_returns(carry, horizon=horizon))
+    return totals, rows
@@ -0,0 +1,90 @@
+# Streaming, typed readers for signal-history uploads (CSV, Parquet, Excel): files are
+# read in chunks with compact dtypes so memory stays bounded however large they are
+import csv
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, pandas chunked parsing is used without it
+    pa = None
+
+REQUIRED_COLUMNS = ['Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time']
+OPTIONAL_COLUMNS = ['Date', 'Index', 'Expiry']
+
+SIGNAL_DTYPE = pd.CategoricalDtype(['BUY CE', 'BUY PE', 'HOLD'])
+PRICE_COLUMNS = ['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP']
+
+
+def compact(chunk):
+    # int32 strikes, float32 OI/prices, categorical signals
+    if any(column not in chunk.columns for column in REQUIRED_COLUMNS):
+        raise ValueError(f"Missing one or more required columns: {REQUIRED_COLUMNS}")
+    chunk = chunk[[column for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if column in chunk.columns]].copy()
+    # rows without a readable strike are dropped, they cannot be matched to any contract
+    chunk['Strike_Price'] = pd.to_numeric(chunk['Strike_Price'], errors='coerce')
+    chunk = chunk.dropna(subset=['Strike_Price'])
+    chunk['Strike_Price'] = chunk['Strike_Price'].astype('int32')
+    for column in PRICE_COLUMNS:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce').astype('float32')
+    chunk['Signal'] = chunk['Signal'].astype(str).astype(SIGNAL_DTYPE)
+    chunk['Time'] = chunk['Time'].astype(str)
+    if 'Date' in chunk.columns:
+        # empty dates stay missing, so those rows are not stamped with another day
+        date = chunk['Date'].astype('string').str.strip()
+        chunk['Date'] = date.mask((date == '').fillna(True))
+    for column in ('Index', 'Expiry'):
+        if column in chunk.columns:
+            chunk[column] = chunk[column].astype(str).astype('category')
+    return chunk
+
+
+def _wanted(column):
+    return column in REQUIRED_COLUMNS or column in OPTIONAL_COLUMNS
+
+
+def _csv_header(file):
+    # Column names of an uploaded CSV; the file is rewound for the reader
+    line = file.readline()
+    file.seek(0)
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig')
+    return next(csv.reader([line]), [])
+
+
+def _convert_options(columns):
+    # Only the wanted columns, with fixed types so no block is typed differently from the first
+    types = {'Strike_Price': pa.float64(), 'Signal': pa.string(), 'Time': pa.string()}
+    types.update({column: pa.float32() for column in PRICE_COLUMNS})
+    types.update({column: pa.string() for column in OPTIONAL_COLUMNS})
+    wanted = [column for column in columns if _wanted(column)]
+    return pa_csv.ConvertOptions(include_columns=wanted, column_types={c: types[c] for c in wanted},
+                                 strings_can_be_null=True)
+
+
+def iter_chunks(file, name, chunksize=500_000):
+    # Yields compact DataFrames of at most `chunksize` rows from an uploaded file
+    if name.endswith('.parquet'):
+        if pa is None:
+            raise ImportError('Reading Parquet uploads requires pyarrow')
+        parquet = pq.ParquetFile(file)
+        columns = [column for column in parquet.schema_arrow.names if _wanted(column)]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield compact(batch.to_pandas())
+    elif name.endswith('.csv'):
+        if pa is not None:
+            reader = pa_csv.open_csv(file, read_options=pa_csv.ReadOptions(block_size=64 << 20),
+                                     convert_options=_convert_options(_csv_header(file)))
+            for batch in reader:
+                yield compact(batch.to_pandas())
+        else:
+            for chunk in pd.read_csv(file, usecols=_wanted, chunksize=chunksize,
+                                     dtype={'Signal': 'category', 'Time': str, 'Date': str}):
+                yield compact(chunk)
+    else:
+        # Excel cannot be streamed; it is read once and handed out in chunks
+        frame = compact(pd.read_excel(file, usecols=_wanted))
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
@@ -0,0 +1,65 @@
+# Appends every polled option-chain snapshot to a daily CSV archive, used for
+# backtests and threshold sweeps over real intraday history
+import glob
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+import snapshots
+
+indian_tz = pytz.timezone('Asia/Kolkata')
+ARCHIVE_DIR = os.environ.get('SNAPSHOT_ARCHIVE_DIR', 'snapshot_archive')
+
+ARCHIVE_COLUMNS = ['Index', 'Expiry', 'Timestamp', 'Spot', 'Strike_Price',
+                   'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP']
+
+_lock = threading.Lock()
+_started = False
+
+
+def archive_snapshots(snaps):
+    # only the process that fetched the snapshots archives them
+    if not snapshots.get_poller().is_publisher():
+        return
+    frames = []
+    for snap in snaps.values():
+        at = datetime.fromtimestamp(snap.fetched_at, indian_tz)
+        frame = snap.chain.reset_index()
+        frame['Index'] = snap.index
+        frame['Expiry'] = snap.expiry
+        frame['Timestamp'] = at.strftime('%Y-%m-%d %H:%M:%S')
+        frame['Spot'] = snap.spot
+        frames.append(frame[ARCHIVE_COLUMNS])
+    if not frames:
+        return
+    day = frames[0]['Timestamp'].iloc[0][:10]
+    path = os.path.join(ARCHIVE_DIR, f'{day}.csv')
+    with _lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        pd.concat(frames).to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def load_archive(days=None):
+    # All archived snapshots (or only the given 'YYYY-MM-DD' days) as one frame
+    paths = sorted(glob.glob(os.path.join(ARCHIVE_DIR, '*.csv')))
+    if days is not None:
+        paths = [path for path in paths if os.path.basename(path)[:10] in set(days)]
+    if not paths:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    archive = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    archive['Timestamp'] = pd.to_datetime(archive['Timestamp'])
+    return archive
+
+
+def start_archiving():
+    # Register the archive writer on the shared poller once per server process
+    global _started
+    with _lock:
+        if not _started:
+            poller = snapshots.get_poller()
+            poller.add_listener(archive_snapshots)
+            poller.start()
+            _started = True
@@ -0,0 +1,167 @@
+# Background poller that fetches option-chain snapshots for every index/expiry
+# once per interval and hands them to listeners (alert engine, history, ...).
+# With SHARED_SNAPSHOTS=1 only one server process on the host fetches; the others
+# pick the snapshots up from shared memory (see shared_snapshots).
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+import metrics
+import option_data
+from nse_client import derivatives
+
+logger = logging.getLogger(__name__)
+indian_tz = pytz.timezone('Asia/Kolkata')
+
+
+class Snapshot:
+    # One fetched option chain: `chain` is indexed by strike with CE_/PE_ columns
+    def __init__(self, index, expiry, chain, spot, fetched_at):
+        self.index = index
+        self.expiry = expiry
+        self.chain = chain
+        self.spot = spot
+        self.fetched_at = fetched_at
+
+    @property
+    def key(self):
+        return self.index, self.expiry
+
+
+class SnapshotPoller:
+    def __init__(self, indices=option_data.INDICES, expiries_per_index=2, interval=180, shared=None):
+        self.indices = indices
+        self.expiries_per_index = expiries_per_index
+        self.interval = interval
+        self.shared = shared
+        self.latest = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener):
+        # listener(snapshots) is called with {(index, expiry): Snapshot} after every poll
+        self._listeners.append(listener)
+
+    def is_publisher(self):
+        # True when this process fetches from NSE (always, unless snapshots are shared)
+        return self.shared is None or self.shared.is_publisher()
+
+    def poll_once(self):
+        if self.is_publisher():
+            fetched = self._fetch()
+            if self.shared is not None:
+                self.shared.publish(fetched)
+        else:
+            fetched = {key: Snapshot(*key, chain, spot, fetched_at)
+                       for key, (chain, spot, fetched_at) in self.shared.read_new().items()}
+
+        with self._lock:
+            self.latest.update(fetched)
+        for listener in self._listeners:
+            try:
+                with metrics.timer(f'listener:{getattr(listener, "__qualname__", repr(listener))}'):
+                    listener(fetched)
+            except Exception:
+                logger.exception('Snapshot listener %r failed', listener)
+        return fetched
+
+    def _fetch(self):
+        fetched = {}
+        for index in self.indices:
+            try:
+                with metrics.timer('poll:spot', index):
+                    cmp = option_data.spot_price(index)
+                expiries = option_data.expiry_dates(index)[:self.expiries_per_index]
+            except Exception:
+                logger.exception('Could not load spot/expiries for %s', index)
+                continue
+            for ex in expiries:
+                try:
+                    with metrics.timer('poll:chain', index, ex):
+                        chain = option_data.fetch_option_chain(index, option_data.to_chain_expiry(ex))
+                except Exception:
+                    logger.exception('Could not fetch option chain for %s %s', index, ex)
+                    continue
+                fetched[(index, ex)] = Snapshot(index, ex, chain, cmp, time.time())
+                metrics.mark_fresh(index, ex, fetched[(index, ex)].fetched_at)
+        return fetched
+
+    def get(self, index, expiry):
+        with self._lock:
+            return self.latest.get((index, expiry))
+
+    def latest_snapshots(self):
+        with self._lock:
+            return dict(self.latest)
+
+    def covered_pairs(self):
+        # (index, expiry) pairs polled recently, i.e. the ones listeners (alerts, history) see
+        cutoff = time.time() - 3 * self.interval
+        with self._lock:
+            pairs = [key for key, snap in self.latest.items() if snap.fetched_at >= cutoff]
+        return sorted(pairs, key=lambda key: (key[0], datetime.strptime(key[1], '%d-%b-%Y')))
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('Snapshot poll failed')
+            # followers only check the shared version counters, so they look often
+            interval = self.interval if self.is_publisher() else self.shared.check_every
+            self._stop.wait(max(0.0, interval - (time.time() - started)))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='snapshot-poller', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_poller(interval=None, expiries_per_index=None):
+    # One poller per server process, shared by every session and page. It polls every
+    # POLL_SECONDS (default 180) the POLL_EXPIRIES (default 2) nearest expiries of each index
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            shared = None
+            if os.environ.get('SHARED_SNAPSHOTS', '') not in ('', '0'):
+                import shared_snapshots
+                shared = shared_snapshots.SharedSnapshots()
+            interval = int(os.environ.get('POLL_SECONDS', 180)) if interval is None else interval
+            if expiries_per_index is None:
+                expiries_per_index = int(os.environ.get('POLL_EXPIRIES', 2))
+            _poller = SnapshotPoller(expiries_per_index=expiries_per_index, interval=interval, shared=shared)
+        return _poller
+
+
+def option_chain(index, ex):
+    """
+    Live option chain of `index` / expiry `ex` (dd-Mon-YYYY) with nselib column names, for
+    the dashboards. Pairs the poller covers come from its latest snapshot, so reruns of
+    every session (and with SHARED_SNAPSHOTS every server process) share one upstream
+    fetch per poll; other pairs are fetched live.
+    """
+    snap = get_poller().start().get(index, ex)
+    if snap is None:
+        return derivatives.nse_live_option_chain(index, option_data.to_chain_expiry(ex))
+    names = {short: name for name, short in {**option_data.CHAIN_COLUMNS, **option_data.VOLUME_COLUMNS}.items()}
+    option = snap.chain.rename(columns=names).reset_index()
+    option['Expiry_Date'] = ex
+    option['Fetch_Time'] = datetime.fromtimestamp(snap.fetched_at, indian_tz).strftime('%d-%b-%Y %H:%M:%S')
+    return option
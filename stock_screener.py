@@ -0,0 +1,62 @@
+# Parallel, incremental NIFTY 50 screener: tickers are evaluated in a process pool and
+# results are cached per ticker until its bars change
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from swing_strategy import screen_symbol
+
+SCREENER_COLUMNS = ['Symbol', 'Buy Signal Date', 'Buy Price', 'Holding Target', 'Current Price',
+                    'Qty', 'Profit/Loss', 'Target Achieved']
+
+# symbol -> (fingerprint of its bars, screener row or None)
+_results = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _executor
+
+
+def bars_fingerprint(data):
+    # Changes whenever a bar is added, removed or revised
+    if data.empty:
+        return ''
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def screen(price_data, qty=20):
+    """
+    Yields the screener row of every symbol in price_data ({symbol: bars}) that has a
+    buy signal, as soon as it is known: unchanged symbols come from the cache first,
+    the others are evaluated in the process pool and yielded as they finish.
+    """
+    pending = {}
+    for symbol, data in price_data.items():
+        fingerprint = bars_fingerprint(data)
+        cached = _results.get(symbol)
+        if cached is not None and cached[0] == (fingerprint, qty):
+            if cached[1] is not None:
+                yield cached[1]
+        else:
+            pending[symbol] = (fingerprint, qty)
+    if not pending:
+        return
+
+    executor = _get_executor()
+    futures = {executor.submit(screen_symbol, symbol, price_data[symbol], qty): symbol for symbol in pending}
+    for future in as_completed(futures):
+        symbol = futures[future]
+        row = future.result()
+        _results[symbol] = (pending[symbol], row)
+        if row is not None:
+            yield row
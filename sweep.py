@@ -0,0 +1,40 @@
+import numpy as np
+import streamlit as st
+import snapshot_archive
+import threshold_sweep
+
+# Add title of the web-app
+st.title(':red[NSE] **Signal Threshold Sweep**')
+st.header('Parameter sweep over archived snapshots', divider='rainbow')
+
+archive = snapshot_archive.load_archive()
+if archive.empty:
+    st.write("No archived snapshots yet. Keep the option dashboard running during market hours to build the archive.")
+else:
+    st.write(f"Archived rows: {len(archive):,} from {archive['Timestamp'].min()} to {archive['Timestamp'].max()}")
+    index = st.sidebar.selectbox("Select index name", ['All'] + sorted(archive['Index'].unique()))
+    horizon = st.sidebar.number_input("Exit after (minutes)", min_value=1, value=15, step=1)
+    min_trades = st.sidebar.number_input("Minimum trades", min_value=1, value=20, step=1)
+    if index != 'All':
+        archive = archive[archive['Index'] == index]
+
+    if st.button("Run sweep"):
+        table = threshold_sweep.sweep(archive, horizon=horizon, min_trades=min_trades)
+
+        st.subheader('Ranked parameter sets')
+        st.dataframe(table, use_container_width=True)
+
+        st.subheader('Expectancy by OI multiplier and PCR band')
+        heat = threshold_sweep.heatmap_table(table)
+        if heat.empty:
+            st.write("No parameter set has enough trades.")
+        else:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(8, 5))
+            image = ax.imshow(heat.to_numpy(), cmap='RdYlGn', aspect='auto')
+            ax.set_xticks(np.arange(len(heat.columns)), [str(c) for c in heat.columns])
+            ax.set_yticks(np.arange(len(heat.index)), [str(r) for r in heat.index])
+            ax.set_xlabel('BUY CE below PCR')
+            ax.set_ylabel('OI change multiplier')
+            fig.colorbar(image, ax=ax, label='Expectancy (best over PE PCR band)')
+            st.pyplot(fig)
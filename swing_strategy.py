@@ -0,0 +1,164 @@
+# Volume/VWAP swing strategy shared by screener.py and the background screener workers
+import threading
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+# interval -> IndicatorBook of the symbols shown on the pages, so a rerun only applies the
+# bars the OHLCV store added since the last one
+_books = {}
+_books_lock = threading.Lock()
+
+
+# Calculate VWAP
+def calculate_vwap(data):
+    return indicators.vwap(data['Close'], data['Volume']).values
+
+
+# VWAP, 20-day average volume and unusual volume flags; with a symbol they are updated
+# incrementally from the bars seen on earlier reruns
+def add_volume_indicators(data, symbol=None, interval='1d'):
+    if symbol is None:
+        data['VWAP'] = calculate_vwap(data)
+        data['Average Volume'] = indicators.rolling_mean(data['Volume'], window=20)
+    else:
+        with _books_lock:
+            book = _books.setdefault(interval, indicators.IndicatorBook(volume_window=20, spike=2.0))
+        streamed = book.update(symbol, data[['Close', 'Volume']].dropna()).reindex(data.index)
+        data['VWAP'] = streamed['VWAP'].to_numpy()
+        data['Average Volume'] = streamed['Average Volume'].to_numpy()
+    data['Average Volume'].fillna(method='bfill', inplace=True)
+    data['Unusual Volume'] = data['Volume'] > 2 * data['Average Volume']
+    data['Unusual Volume'].fillna(False, inplace=True)
+    return data
+
+
+# Backtest Strategy
+def backtest(data):
+    signals = data['Unusual Volume'].shift(1)  # Signal occurs on the previous day
+    data['Signal'] = signals
+    data['Daily Return'] = data['Close'].pct_change()
+    data['Strategy Return'] = data['Daily Return'] * data['Signal']
+    data['Cumulative Market Return'] = (1 + data['Daily Return']).cumprod()
+    data['Cumulative Strategy Return'] = (1 + data['Strategy Return']).cumprod()
+    return data
+
+
+# Swing Trading Signals
+def swing_trade_signals(data):
+    data = data.copy()
+    data['Unusual Volume'].fillna(False, inplace=True)
+    data['Close'].fillna(method='ffill', inplace=True)
+    data['VWAP'].fillna(method='ffill', inplace=True)
+    buy_signals = (data['Unusual Volume'] & (data['Close'] > data['VWAP'])).astype(bool)
+    buy_signals.fillna(False, inplace=True)
+    data['Buy Signal'] = buy_signals.shift(1)  # Signal occurs on the previous day
+    return data
+
+
+def first_hit_times(close, entries, targets=(0.05,), stop_loss=None, max_holding=None, chunk=256):
+    """
+    Bar offsets at which every entry first closes at or above each target (and at or
+    below the stop-loss), computed for all entries at once on a strided view of the
+    close series. -1 means the level was not reached within max_holding bars.
+    Returns (target_hits of shape (entries, targets), stop_hits of shape (entries,)).
+    """
+    close = np.asarray(close, dtype=float)
+    entries = np.asarray(entries, dtype=int)
+    targets = np.asarray(targets, dtype=float)
+    horizon = len(close) if max_holding is None else min(len(close), max_holding + 1)
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([close, np.full(horizon, np.nan)]), horizon)
+
+    target_hits = np.full((len(entries), len(targets)), -1)
+    stop_hits = np.full(len(entries), -1)
+    for start in range(0, len(entries), chunk):
+        rows = entries[start:start + chunk]
+        path = windows[rows] / close[rows, None]  # price relative to the entry close
+        hit = path[:, :, None] >= 1 + targets
+        target_hits[start:start + chunk] = np.where(hit.any(axis=1), hit.argmax(axis=1), -1)
+        if stop_loss is not None:
+            stopped = path <= 1 - stop_loss
+            stop_hits[start:start + chunk] = np.where(stopped.any(axis=1), stopped.argmax(axis=1), -1)
+    return target_hits, stop_hits
+
+
+# Holding period of every buy signal: exit at the first target, the stop-loss or max_holding bars
+def holding_periods(data, targets=(0.05,), stop_loss=None, max_holding=None):
+    close = data['Close'].to_numpy(dtype=float)
+    entries = np.flatnonzero(data['Buy Signal'].fillna(False).to_numpy(dtype=bool))
+    target_hits, stop_hits = first_hit_times(close, entries, targets, stop_loss, max_holding)
+
+    last = len(close) - 1
+    never = np.iinfo(int).max
+    to_target = np.where(target_hits[:, 0] >= 0, target_hits[:, 0], never)
+    to_stop = np.where(stop_hits >= 0, stop_hits, never)
+    if max_holding is None:
+        to_limit = np.full(len(entries), never)
+    else:
+        to_limit = np.where(entries + max_holding <= last, max_holding, never)
+    offsets = np.minimum(np.minimum(to_target, to_stop), to_limit)
+    closed = offsets != never
+    exits = np.where(closed, entries + np.where(closed, offsets, 0), last)
+    reasons = np.select([closed & (to_target == offsets), closed & (to_stop == offsets), closed],
+                        ['Target', 'Stop Loss', 'Max Holding'], 'Open')
+
+    index = data.index
+
+    def days(start, end):
+        return (index[end] - index[start]).total_seconds().to_numpy() / 86400
+
+    result = pd.DataFrame({
+        'Entry Date': index[entries],
+        'Entry Price': close[entries],
+        'Exit Date': index[exits],
+        'Exit Reason': reasons,
+        'Holding Days': days(entries, exits),
+        'Return': close[exits] / close[entries] - 1,
+    })
+    for i, target in enumerate(targets):
+        hits = target_hits[:, i]
+        result[f'Days to +{target:.0%}'] = np.where(hits >= 0, days(entries, entries + np.maximum(hits, 0)), np.nan)
+    return result
+
+
+# Predict target holding period
+def predict_holding_period(data, target=0.05):
+    # Mean days to the target over the signals that reached it
+    periods = holding_periods(data, targets=(target,))[f'Days to +{target:.0%}'].dropna()
+    if not periods.empty:
+        return int(np.mean(periods))
+    else:
+        return 20  # Default to 20 days if no historical signals
+
+
+# Stock Screener row for one symbol (None when it has no buy signal)
+def screen_symbol(symbol, data, qty=20):
+    if data.empty:
+        return None
+    data = add_volume_indicators(data.copy())
+    swing_data = swing_trade_signals(data)
+    swing_data['Buy Signal'].fillna(False, inplace=True)
+
+    if not swing_data['Buy Signal'].any():
+        return None
+    recent_signal = swing_data[swing_data['Buy Signal']].tail(1)
+    if recent_signal.empty:
+        return None
+    last_signal_date = recent_signal.index[-1]
+    buy_price = recent_signal['Close'].values[0]
+    holding_target = buy_price * 1.05  # Assuming a 5% holding target
+    current_price = data['Close'].iloc[-1]
+    target_achieved = current_price >= holding_target
+    profit_loss = (current_price - buy_price) * qty
+    return {
+        'Symbol': symbol,
+        'Buy Signal Date': last_signal_date,
+        'Buy Price': buy_price,
+        'Holding Target': holding_target,
+        'Current Price': current_price,
+        'Qty': qty,
+        'Profit/Loss': profit_loss,
+        'Target Achieved': target_achieved
+    }
@@ -0,0 +1,104 @@
+# Synthetic NSE option chains for benchmarks and load tests: strikes around a spot price,
+# several expiries, OI peaking out of the money with extra OI on round strikes, LTP from
+# Black-Scholes with an IV smile, and a random walk to produce the next snapshots
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import option_data
+
+# Typical spot of each index, used when no spot is given
+SPOTS = {'NIFTY': 24500.0, 'BANKNIFTY': 52000.0, 'FINNIFTY': 23800.0}
+
+
+def _norm_cdf(x):
+    # Logistic-tanh approximation of the standard normal CDF (error < 2e-4)
+    return 0.5 * (1 + np.tanh(np.sqrt(2 / np.pi) * (x + 0.044715 * x ** 3)))
+
+
+def _black_scholes(spot, strikes, years, iv, rate=0.07):
+    sd = iv * np.sqrt(years)
+    d1 = (np.log(spot / strikes) + (rate + iv ** 2 / 2) * years) / sd
+    d2 = d1 - sd
+    discount = strikes * np.exp(-rate * years)
+    call = spot * _norm_cdf(d1) - discount * _norm_cdf(d2)
+    put = discount * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+    return np.maximum(call, 0.05), np.maximum(put, 0.05)
+
+
+def expiry_dates(n_expiries=2, start=None):
+    # Weekly Thursday expiries in NSE format (dd-Mon-YYYY), nearest first
+    start = start or datetime.now()
+    first = start + timedelta(days=(3 - start.weekday()) % 7)
+    return [(first + timedelta(weeks=k)).strftime('%d-%b-%Y') for k in range(n_expiries)]
+
+
+def option_chain(index='NIFTY', n_strikes=200, n_expiries=1, spot=None, seed=None, now=None):
+    """
+    Chain with nselib's columns (Symbol, Expiry_Date, Strike_Price and CALLS_*/PUTS_*
+    fields) for `n_strikes` strikes around the spot and each of `n_expiries` expiries.
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    spot = SPOTS.get(index, 20000.0) if spot is None else spot
+    step = option_data.STRIKE_WINDOWS.get(index, (50, 0))[0]
+    atm = round(spot / step) * step
+    strikes = atm + step * (np.arange(n_strikes) - n_strikes // 2)
+    frames = []
+    for k, expiry in enumerate(expiry_dates(n_expiries, now)):
+        days = max((datetime.strptime(expiry, '%d-%b-%Y') - now).days, 0) + 1
+        moneyness = np.log(strikes / spot)
+        iv = 0.12 + 0.8 * moneyness ** 2 + rng.normal(0, 0.005, n_strikes)
+        call_ltp, put_ltp = _black_scholes(spot, strikes, days / 365, iv)
+        # OI peaks a few percent out of the money on each side, more on round strikes
+        round_strike = 1 + 1.5 * (strikes % (10 * step) == 0) + 0.5 * (strikes % (2 * step) == 0)
+        scale = 2e6 / (k + 1)
+        call_oi = scale * np.exp(-((moneyness - 0.02) / 0.025) ** 2) * round_strike * rng.uniform(0.6, 1.4, n_strikes)
+        put_oi = scale * np.exp(-((moneyness + 0.02) / 0.025) ** 2) * round_strike * rng.uniform(0.6, 1.4, n_strikes)
+        chain = pd.DataFrame({
+            'Fetch_Time': now.strftime('%d-%b-%Y %H:%M:%S'),
+            'Symbol': index,
+            'Expiry_Date': expiry,
+            'Strike_Price': strikes.astype(float),
+        })
+        for prefix, ltp, oi in (('CALLS', call_ltp, call_oi), ('PUTS', put_ltp, put_oi)):
+            oi = np.round(oi / 25) * 25
+            chain[f'{prefix}_OI'] = oi
+            chain[f'{prefix}_Chng_in_OI'] = np.round(oi * rng.normal(0.05, 0.3, n_strikes) / 25) * 25
+            chain[f'{prefix}_Volume'] = np.round(oi * rng.uniform(0.5, 5, n_strikes) / 25) * 25
+            chain[f'{prefix}_IV'] = np.round(iv * 100, 2)
+            chain[f'{prefix}_LTP'] = np.round(ltp, 2)
+            chain[f'{prefix}_Net_Chng'] = np.round(ltp * rng.normal(0, 0.1, n_strikes), 2)
+            chain[f'{prefix}_Bid_Qty'] = rng.integers(1, 200, n_strikes) * 25
+            chain[f'{prefix}_Bid_Price'] = np.round(ltp * 0.995, 2)
+            chain[f'{prefix}_Ask_Price'] = np.round(ltp * 1.005, 2)
+            chain[f'{prefix}_Ask_Qty'] = rng.integers(1, 200, n_strikes) * 25
+        frames.append(chain)
+    return pd.concat(frames, ignore_index=True)
+
+
+def evolve(chain, rng=None, minutes=3):
+    # Next snapshot of a chain: random walk of LTP and OI, cumulative volume only grows
+    rng = rng or np.random.default_rng()
+    chain = chain.copy()
+    n = len(chain)
+    for prefix in ('CALLS', 'PUTS'):
+        ltp = chain[f'{prefix}_LTP'].to_numpy(dtype=float)
+        chain[f'{prefix}_LTP'] = np.round(np.maximum(ltp * np.exp(rng.normal(0, 0.03, n)), 0.05), 2)
+        oi_change = np.round(chain[f'{prefix}_OI'].to_numpy(dtype=float) * rng.normal(0, 0.02, n) / 25) * 25
+        chain[f'{prefix}_OI'] = np.maximum(chain[f'{prefix}_OI'] + oi_change, 0)
+        chain[f'{prefix}_Chng_in_OI'] = chain[f'{prefix}_Chng_in_OI'] + oi_change
+        chain[f'{prefix}_Volume'] = chain[f'{prefix}_Volume'] + np.round(np.abs(oi_change) * rng.uniform(1, 4, n) / 25) * 25
+    at = datetime.strptime(chain['Fetch_Time'].iloc[0], '%d-%b-%Y %H:%M:%S') + timedelta(minutes=minutes)
+    chain['Fetch_Time'] = at.strftime('%d-%b-%Y %H:%M:%S')
+    return chain
+
+
+def to_chain(option, expiry=None):
+    # Same shape as option_data.fetch_option_chain: one expiry, indexed by strike, CE_/PE_ names
+    if expiry is not None:
+        option = option[option['Expiry_Date'] == expiry]
+    columns = ['Strike_Price', *option_data.CHAIN_COLUMNS, *option_data.VOLUME_COLUMNS]
+    o = option[columns].set_index('Strike_Price')
+    return o.rename(columns={**option_data.CHAIN_COLUMNS, **option_data.VOLUME_COLUMNS})
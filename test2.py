@@ -1,11 +1,11 @@
-from nselib import derivatives
-from nselib import capital_market
-import matplotlib.pyplot as plt
+from nse_client import derivatives, capital_market
 from datetime import datetime
 import numpy as np
 import pandas as pd
 import streamlit as st
+import snapshots
 import time
+import session_store
 import pytz  # Handling Indian time zone
 
 # Add title of the web-app
@@ -23,11 +23,10 @@ tab1, tab2, tab4, tab5, tab6, tab7, tab8 = st.tabs([
 # Sidebar for index instrument and expiry date selection
 index = st.sidebar.selectbox("Select index name", ('NIFTY', "BANKNIFTY", "FINNIFTY"))
 ex = st.sidebar.selectbox('Select expiry date', derivatives.expiry_dates_option_index()[index])
-exp = datetime.strptime(ex, '%d-%b-%Y').strftime('%d-%m-%Y')
 
 # Extracting data from nselib
 try:
-    option = derivatives.nse_live_option_chain(index, exp)
+    option = snapshots.option_chain(index, ex)
 
     # Renaming and reformatting columns for better readability
     o = option[['CALLS_OI', 'CALLS_Chng_in_OI', 'CALLS_LTP', 'Strike_Price', 'PUTS_LTP', 'PUTS_Chng_in_OI', 'PUTS_OI']].set_index('Strike_Price')
@@ -77,6 +76,7 @@ try:
         oi_atm_filtered['Time'] = current_time
 
         # Plotting OI and OI Change
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(2, 2, figsize=(12, 8))
         ax[0, 0].bar(oi_atm_filtered.index, oi_atm_filtered['CE_OI'], color='blue', width=10)
         ax[0, 1].bar(oi_atm_filtered.index, oi_atm_filtered['PE_OI'], color='red', width=10)
@@ -119,13 +119,17 @@ try:
 
         if 'signal_history' not in st.session_state:
             st.session_state.signal_history = pd.DataFrame(columns=[
-                'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time'
+                'Strike_Price', 'CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time',
+                'Date', 'Index', 'Expiry'
             ])
 
         current_signals = oi[['CE_OI', 'CE_CHG_OI', 'CE_LTP', 'PE_OI', 'PE_CHG_OI', 'PE_LTP', 'Signal', 'Time']].copy()
         current_signals['Strike_Price'] = current_signals.index
+        current_signals['Date'] = datetime.now(indian_tz).strftime('%Y-%m-%d')
+        current_signals['Index'] = index
+        current_signals['Expiry'] = ex
 
-        st.session_state.signal_history = pd.concat([st.session_state.signal_history, current_signals], ignore_index=True)
+        session_store.append_rows('signal_history', current_signals)
 
         st.dataframe(
             st.session_state.signal_history.style.applymap(
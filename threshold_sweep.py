@@ -0,0 +1,97 @@
+# Parallel sweep of the OI signal thresholds over the snapshot archive. Features (PCR,
+# forward returns) are computed once and shared by every grid point of a worker.
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Default grid: OI change multiplier of generate_signal (2x) / OI Change Alert (3x)
+# and the PCR bands of chageoi09.py (BUY CE below pcr_low, BUY PE above pcr_high)
+DEFAULT_GRID = {
+    'multiplier': [1.5, 2.0, 2.5, 3.0, 4.0],
+    'pcr_low': [0.6, 0.7, 0.8, 0.9, np.inf],
+    'pcr_high': [0.0, 1.0, 1.1, 1.2, 1.3],
+}
+
+_features = None
+
+
+def build_features(archive, horizon=15):
+    # Snapshot PCR and the forward CE/PE returns `horizon` minutes later on the same
+    # trading day for every row (nan when the day closes first)
+    keys = ['Index', 'Expiry', 'Strike_Price', 'Day']
+    df = archive.copy()
+    df['Strike_Price'] = df['Strike_Price'].astype(float)
+    df['Day'] = df['Timestamp'].dt.normalize()
+    snapshot = df.groupby(['Index', 'Expiry', 'Timestamp'])
+    df['PCR'] = snapshot['PE_OI'].transform('sum') / snapshot['CE_OI'].transform('sum')
+    df['Exit_Target'] = df['Timestamp'] + pd.Timedelta(minutes=horizon)
+
+    exits = df[keys + ['Timestamp', 'CE_LTP', 'PE_LTP']].rename(columns={
+        'Timestamp': 'Exit_Time', 'CE_LTP': 'Exit_CE_LTP', 'PE_LTP': 'Exit_PE_LTP'
+    }).sort_values('Exit_Time')
+    df = pd.merge_asof(df.sort_values('Exit_Target'), exits, left_on='Exit_Target', right_on='Exit_Time',
+                       by=keys, direction='forward')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ce_ret = np.where(df['CE_LTP'] > 0, df['Exit_CE_LTP'] / df['CE_LTP'] - 1, np.nan)
+        pe_ret = np.where(df['PE_LTP'] > 0, df['Exit_PE_LTP'] / df['PE_LTP'] - 1, np.nan)
+    return {
+        'ce_chg': df['CE_CHG_OI'].to_numpy(dtype=float),
+        'pe_chg': df['PE_CHG_OI'].to_numpy(dtype=float),
+        'pcr': df['PCR'].to_numpy(dtype=float),
+        'ce_ret': ce_ret,
+        'pe_ret': pe_ret,
+    }
+
+
+def evaluate(features, multiplier, pcr_low, pcr_high):
+    # Same rules as generate_signal with PCR confirmation; BUY CE takes precedence
+    f = features
+    buy_ce = (f['pe_chg'] > f['ce_chg'] * multiplier) & (f['pcr'] < pcr_low)
+    buy_pe = (f['ce_chg'] > f['pe_chg'] * multiplier) & (f['pcr'] > pcr_high) & ~buy_ce
+    returns = np.concatenate([f['ce_ret'][buy_ce], f['pe_ret'][buy_pe]])
+    returns = returns[np.isfinite(returns)]
+    trades = len(returns)
+    return {
+        'multiplier': multiplier,
+        'pcr_low': pcr_low,
+        'pcr_high': pcr_high,
+        'Trades': trades,
+        'Win_Rate': float((returns > 0).mean()) if trades else np.nan,
+        'Expectancy': float(returns.mean()) if trades else np.nan,
+        'Total_Return': float(returns.sum()),
+    }
+
+
+def _init_worker(features):
+    global _features
+    _features = features
+
+
+def _evaluate_chunk(points):
+    return [evaluate(_features, *point) for point in points]
+
+
+def sweep(archive, grid=DEFAULT_GRID, horizon=15, min_trades=20, workers=None):
+    """
+    Evaluates every combination of the grid over the archive on all cores and returns
+    the parameter sets ranked by expectancy (sets with fewer than min_trades last).
+    """
+    features = build_features(archive, horizon)
+    points = list(itertools.product(grid['multiplier'], grid['pcr_low'], grid['pcr_high']))
+    workers = workers or os.cpu_count()
+    chunks = [points[i::workers] for i in range(workers) if points[i::workers]]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features,)) as executor:
+        results = [row for rows in executor.map(_evaluate_chunk, chunks) for row in rows]
+
+    table = pd.DataFrame(results)
+    table['Enough_Trades'] = table['Trades'] >= min_trades
+    return table.sort_values(['Enough_Trades', 'Expectancy'], ascending=False).reset_index(drop=True)
+
+
+def heatmap_table(table, rows='multiplier', columns='pcr_low', value='Expectancy'):
+    # Best value over the remaining parameters for every (rows, columns) pair
+    return table[table['Enough_Trades']].pivot_table(index=rows, columns=columns, values=value, aggfunc='max')